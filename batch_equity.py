@@ -0,0 +1,279 @@
+"""
+Offline equity for logged spots (hand histories, post-session analysis).
+
+Reads spots from CSV or JSONL, one per row/line, with the fields
+`hero` ("AhKh"), `board` ("Qh7h2c", may be empty), `num_players` and an
+optional `id`. Equity is computed in parallel chunks and written to a CSV
+or JSONL file as each chunk finishes, in input order:
+
+    python batch_equity.py spots.csv results.jsonl --iterations 20000 --workers 4
+
+Only a few chunks are held in memory at a time. If the output file already
+exists, the run resumes after the last complete record (use --overwrite to
+start over). Every spot gets its own RNG stream derived from --seed and its
+position in the input, so a resumed run gives the same results as an
+uninterrupted one.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+import exact
+import preflop
+import vector_sim
+from cards import str_to_index
+from poker import DEFAULT_EXACT_LIMIT, confidence_interval, sampling_error
+
+DEFAULT_ITERATIONS = 20000
+DEFAULT_CHUNK_SIZE = 256
+
+# Bytes read at a time when scanning an existing output file
+READ_BLOCK_SIZE = 1 << 20
+
+OUTPUT_FIELDS = ['id', 'hero', 'board', 'num_players', 'win_rate', 'tie_rate', 'std_error',
+                 'ci_low', 'ci_high', 'method', 'iterations', 'error']
+
+_CARD = re.compile(r'[2-9TJQKA][shdc]', re.IGNORECASE)
+
+# Loaded once per worker process
+_preflop_table = None
+
+
+def parse_cards(text):
+    """Parses 'AhKh', 'Ah Kh' or a list of labels into card indices. Raises ValueError."""
+    if isinstance(text, (list, tuple)):
+        text = ''.join(text)
+    text = text or ''
+    if not isinstance(text, str):
+        raise ValueError(f"Invalid cards: {text!r}")
+    text = text.replace(' ', '').replace(',', '')
+    labels = _CARD.findall(text)
+    if ''.join(labels) != text:
+        raise ValueError(f"Invalid cards: {text!r}")
+    return [str_to_index(label[0].upper() + label[1].lower()) for label in labels]
+
+
+def compute_equity(hero, board, num_players, iterations=DEFAULT_ITERATIONS, rng=None,
+                   exact_limit=DEFAULT_EXACT_LIMIT, preflop_table=None):
+    """
+    Stateless equity for one spot.
+    hero, board: card indices (see cards.py)
+    Uses the preflop table when given, exact enumeration for small spots and
+    vectorized Monte Carlo otherwise. Returns a dict with win_rate, tie_rate
+    (percent), std_error, ci_low, ci_high, method and iterations.
+    """
+    if len(hero) != 2 or len(board) not in (0, 3, 4, 5):
+        raise ValueError("Need 2 hero cards and 0, 3, 4 or 5 board cards")
+    if len(set(hero + board)) != len(hero) + len(board):
+        raise ValueError("Duplicate cards")
+    if not preflop.MIN_PLAYERS <= num_players <= preflop.MAX_PLAYERS:
+        raise ValueError(f"num_players must be {preflop.MIN_PLAYERS}..{preflop.MAX_PLAYERS}")
+
+    if not board and preflop_table is not None:
+        win_rate, tie_rate = preflop.lookup(preflop_table, hero, num_players)
+        method, samples = 'preflop', preflop.TABLE_ITERATIONS
+        std_error = sampling_error(win_rate / 100 * samples, samples)
+    elif exact.count_combinations(len(board), num_players - 1) <= exact_limit:
+        wins, ties, total = exact.enumerate_equity(hero, board, num_players - 1)
+        win_rate, tie_rate = wins / total * 100, ties / total * 100
+        method, samples, std_error = 'exact', total, 0.0
+    else:
+        wins, ties = vector_sim.simulate(hero, board, num_players - 1, iterations, rng)
+        win_rate, tie_rate = wins / iterations * 100, ties / iterations * 100
+        method, samples, std_error = 'monte_carlo', iterations, sampling_error(wins, iterations)
+
+    ci_low, ci_high = confidence_interval(win_rate, std_error)
+    return {
+        "win_rate": win_rate,
+        "tie_rate": tie_rate,
+        "std_error": std_error,
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "method": method,
+        "iterations": samples
+    }
+
+
+def read_spots(path):
+    """
+    Streams spot dicts from a CSV or JSONL file. A line that can't be read
+    as a spot yields {'error': ...} instead, so every input spot still gets
+    exactly one output record (resuming counts on that).
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            rows = csv.DictReader(f)
+            while True:
+                try:
+                    yield next(rows)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    yield {"error": f"Line {rows.line_num}: {e}"}
+        else:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    spot = json.loads(line)
+                except ValueError as e:
+                    yield {"error": f"Line {number}: invalid JSON ({e})"}
+                    continue
+                if not isinstance(spot, dict):
+                    yield {"error": f"Line {number}: expected an object, got {type(spot).__name__}"}
+                    continue
+                yield spot
+
+
+def _process_chunk(spots, start_index, iterations, exact_limit, seed):
+    """Worker: equity for a list of spot dicts. Bad spots get an error record instead."""
+    global _preflop_table
+    if _preflop_table is None:
+        _preflop_table = preflop.load_table()
+
+    results = []
+    for offset, spot in enumerate(spots):
+        index = start_index + offset
+        record = {
+            "id": spot.get('id', index),
+            "hero": spot.get('hero'),
+            "board": spot.get('board') or '',
+            "num_players": spot.get('num_players')
+        }
+        if spot.get('error'):
+            # Unreadable input line (see read_spots)
+            record["error"] = spot['error']
+            results.append(record)
+            continue
+        try:
+            rng = np.random.default_rng([seed, index])
+            record.update(compute_equity(
+                parse_cards(spot.get('hero')), parse_cards(spot.get('board')), int(spot.get('num_players', 2)),
+                iterations, rng, exact_limit, _preflop_table
+            ))
+        except (ValueError, TypeError) as e:
+            record["error"] = str(e)
+        results.append(record)
+    return results
+
+
+def _completed_records(path):
+    """
+    Number of complete records in an existing output file. A partially
+    written last line is cut off so appending continues cleanly.
+    """
+    if not os.path.exists(path):
+        return 0
+    lines = 0
+    with open(path, 'rb+') as f:
+        # Walk back from the end to the last newline
+        size = end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - READ_BLOCK_SIZE)
+            f.seek(start)
+            block = f.read(end - start)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+
+        f.seek(0)
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            lines += block.count(b'\n')
+    # The CSV header is not a record
+    if path.endswith('.csv') and lines:
+        lines -= 1
+    return lines
+
+
+class _Writer:
+    def __init__(self, path, append):
+        self.csv = path.endswith('.csv')
+        self.file = open(path, 'a' if append else 'w', newline='')
+        if self.csv:
+            self.writer = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+            if not append:
+                self.writer.writeheader()
+
+    def write(self, records):
+        for record in records:
+            if self.csv:
+                self.writer.writerow(record)
+            else:
+                self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def run_batch(input_path, output_path, iterations=DEFAULT_ITERATIONS, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+              seed=0, exact_limit=DEFAULT_EXACT_LIMIT, overwrite=False, verbose=True):
+    """Computes equity for every spot in `input_path`. Returns the number of spots processed in this run."""
+    workers = workers or os.cpu_count() or 1
+    done = 0 if overwrite else _completed_records(output_path)
+    writer = _Writer(output_path, append=done > 0)
+    if verbose and done:
+        print(f"Resuming after {done} spots")
+
+    spots = islice(read_spots(input_path), done, None)
+    processed = 0
+    start = time.time()
+    # spawn: same reasoning as sim_pool.py
+    context = multiprocessing.get_context('spawn')
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            # Bounded number of chunks in flight keeps memory flat; results are written in input order
+            pending = deque()
+            position = done
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = list(islice(spots, chunk_size))
+                    if not chunk:
+                        break
+                    pending.append(executor.submit(_process_chunk, chunk, position, iterations, exact_limit, seed))
+                    position += len(chunk)
+                if not pending:
+                    break
+                records = pending.popleft().result()
+                writer.write(records)
+                processed += len(records)
+                if verbose:
+                    rate = processed / max(time.time() - start, 1e-9)
+                    print(f"{done + processed} spots written ({rate:.0f}/s)")
+    finally:
+        writer.close()
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute equity for logged spots")
+    parser.add_argument('input', help="CSV or JSONL file with hero, board, num_players and optional id")
+    parser.add_argument('output', help="results file (.csv or .jsonl)")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help="Monte Carlo iterations per spot")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="spots per worker task")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--exact-limit', type=int, default=DEFAULT_EXACT_LIMIT)
+    parser.add_argument('--overwrite', action='store_true', help="start over instead of resuming")
+    args = parser.parse_args()
+
+    processed = run_batch(args.input, args.output, args.iterations, args.workers, args.chunk_size,
+                          args.seed, args.exact_limit, args.overwrite)
+    print(f"Done: {processed} spots written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import asyncio
+
+
+class InferenceBatcher:
+    """
+    Collects frames from every session and runs them through the detector
+    in batches. A batch is sent as soon as it holds `max_batch_size` frames
+    or `max_wait_ms` has passed since its first frame arrived, so the wait
+    bounds the latency added to a frame and the batch size bounds throughput.
+    """
+
+    def __init__(self, detector, executor, max_batch_size=8, max_wait_ms=10):
+        self.detector = detector
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.frames = 0
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def detect(self, frame):
+        """Queues a frame and waits for its detections (same format as CardDetector.detect)"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((frame, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Frames whose requester gave up (newer frame, disconnect) are skipped
+            batch = [(frame, future) for frame, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            try:
+                results = await loop.run_in_executor(self.executor, self.detector.detect_batch, [f for f, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.frames += len(batch)
+            for (_, future), cards in zip(batch, results):
+                if not future.done():
+                    future.set_result(cards)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch_size": self.frames / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms
+        }
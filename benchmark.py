@@ -0,0 +1,450 @@
+"""
+Benchmarks for the detect -> update_state -> calculate_odds pipeline.
+
+    python benchmark.py --output results.json
+    python benchmark.py --suites evaluator,simulation --output after.json
+    python benchmark.py --compare results.json after.json --threshold 0.1
+
+Suites:
+    evaluator   hand evaluator throughput (batched and single hands)
+    simulation  calculate_odds latency per stage and player count
+    pipeline    per-frame update_state and calculate_odds time on recorded detections
+    detector    YOLO latency per frame for several batch sizes, for the --model
+                backend (.pt, .onnx or OpenVINO .xml; skipped without a model)
+    websocket   end-to-end frame latency with N concurrent clients against a server
+
+Every metric is written as {"suite", "name", "value", "unit", "better"} so
+two runs can be compared; --compare exits with status 1 when a metric got
+worse by more than the threshold. All random inputs come from --seed.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import cv2
+import numpy as np
+
+from cards import NUM_CARDS
+
+SUITES = ['evaluator', 'simulation', 'pipeline', 'detector', 'websocket']
+DEFAULT_FRAMES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'verification_frame.jpg')
+
+# Fixed spot (Ah Kh on Qh 7h 2c 3d 9s) cut to each stage
+HERO = ['Ah', 'Kh']
+BOARD = ['Qh', '7h', '2c', '3d', '9s']
+STAGES = {'preflop': 0, 'flop': 3, 'turn': 4, 'river': 5}
+PLAYER_COUNTS = [2, 3, 6, 9]
+
+# Recorded detections replayed by the pipeline suite: the hand is dealt over
+# a few frames the way the camera sees it
+RECORDED_DETECTIONS = [
+    [],
+    [{'label': 'Ah', 'conf': 0.95, 'bbox': (100, 300, 150, 400)},
+     {'label': 'Kh', 'conf': 0.94, 'bbox': (160, 300, 210, 400)}],
+    [{'label': 'Ah', 'conf': 0.95, 'bbox': (100, 300, 150, 400)},
+     {'label': 'Kh', 'conf': 0.94, 'bbox': (160, 300, 210, 400)},
+     {'label': 'Qh', 'conf': 0.90, 'bbox': (100, 100, 150, 200)},
+     {'label': '7h', 'conf': 0.88, 'bbox': (160, 100, 210, 200)},
+     {'label': '2c', 'conf': 0.92, 'bbox': (220, 100, 270, 200)}],
+]
+
+
+def metric(suite, name, value, unit, better='lower', **params):
+    entry = {"suite": suite, "name": name, "value": value, "unit": unit, "better": better}
+    if params:
+        entry["params"] = params
+    return entry
+
+
+def _percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def load_frames(path):
+    """Recorded frames from an image file or a directory of images"""
+    paths = sorted(glob.glob(os.path.join(path, '*'))) if os.path.isdir(path) else [path]
+    frames = [cv2.imread(p) for p in paths]
+    return [f for f in frames if f is not None]
+
+
+def bench_evaluator(args, rng):
+    from hand_evaluator import get_evaluator
+    evaluator = get_evaluator()
+
+    # Random 7-card hands: the 7 smallest of 52 random keys per row
+    hands = np.argsort(rng.random((args.hands, NUM_CARDS)), axis=1)[:, :7]
+    evaluator.evaluate_batch(hands[:1000])
+    start = time.perf_counter()
+    evaluator.evaluate_batch(hands)
+    batch_rate = args.hands / (time.perf_counter() - start)
+
+    singles = [list(h) for h in hands[:20000]]
+    start = time.perf_counter()
+    for hand in singles:
+        evaluator.evaluate(hand)
+    single_rate = len(singles) / (time.perf_counter() - start)
+
+    return [
+        metric('evaluator', 'batch_hands_per_sec', batch_rate, 'hands/s', 'higher'),
+        metric('evaluator', 'single_hands_per_sec', single_rate, 'hands/s', 'higher'),
+    ]
+
+
+def bench_simulation(args, rng):
+    from treys import Card
+    from poker import PokerEngine
+
+    results = []
+    for stage, board_size in STAGES.items():
+        for num_players in PLAYER_COUNTS:
+            timings = []
+            odds = None
+            for repeat in range(args.repeats):
+                # Fresh engine each time: no cache hits or incremental refinement
+                poker = PokerEngine(cache_size=0, seed=args.seed + repeat)
+                poker.hero_hand = [Card.new(c) for c in HERO]
+                poker.community_cards = [Card.new(c) for c in BOARD[:board_size]]
+                poker.set_num_players(num_players)
+                start = time.perf_counter()
+                odds = poker.calculate_odds()
+                timings.append(time.perf_counter() - start)
+
+            method = 'exact' if odds.get('exact') else 'preflop' if odds.get('precomputed') else 'monte_carlo'
+            results.append(metric('simulation', f'{stage}_{num_players}p_ms', _percentile_ms(timings, 50), 'ms',
+                                  stage=stage, num_players=num_players, method=method,
+                                  iterations=odds.get('iterations')))
+    return results
+
+
+def bench_pipeline(args, rng):
+    from poker import PokerEngine
+
+    poker = PokerEngine(cache_size=0, seed=args.seed)
+    poker.set_num_players(6)
+    update_times, odds_times = [], []
+    for frame_index in range(args.pipeline_frames):
+        detections = RECORDED_DETECTIONS[min(frame_index * len(RECORDED_DETECTIONS) // args.pipeline_frames,
+                                             len(RECORDED_DETECTIONS) - 1)]
+        start = time.perf_counter()
+        poker.update_state(detections)
+        if len(poker.hero_hand) == 2 and not poker.hero_hand_locked:
+            poker.lock_hero_hand()
+        update_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        poker.calculate_odds()
+        odds_times.append(time.perf_counter() - start)
+
+    return [
+        metric('pipeline', 'update_state_p50_ms', _percentile_ms(update_times, 50), 'ms'),
+        metric('pipeline', 'calculate_odds_p50_ms', _percentile_ms(odds_times, 50), 'ms'),
+        metric('pipeline', 'calculate_odds_p95_ms', _percentile_ms(odds_times, 95), 'ms'),
+    ]
+
+
+def bench_detector(args, rng):
+    try:
+        from detector import CardDetector
+        detector = CardDetector(args.model)
+    except ImportError as e:
+        return [metric('detector', 'skipped', 0, '', skipped=f"detector unavailable: {e}")]
+    if detector.model is None:
+        return [metric('detector', 'skipped', 0, '', skipped="model could not be loaded")]
+
+    frames = load_frames(args.frames)
+    if not frames:
+        return [metric('detector', 'skipped', 0, '', skipped=f"no frames in {args.frames}")]
+
+    results = []
+    detector.detect_batch(frames[:1])
+    for batch_size in (1, 2, 4, 8):
+        batch = [frames[i % len(frames)] for i in range(batch_size)]
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            detector.detect_batch(batch)
+            timings.append((time.perf_counter() - start) / batch_size)
+        results.append(metric('detector', f'batch{batch_size}_ms_per_frame', _percentile_ms(timings, 50), 'ms',
+                              batch_size=batch_size, backend=detector.backend))
+    return results
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(port, timeout):
+    """
+    Polls the server's /ready (see start_app.wait_until_ready): the port opens
+    before the detector is loaded. Returns the last status, None if the
+    server never answered.
+    """
+    url = f"http://127.0.0.1:{port}/ready"
+    deadline = time.time() + timeout
+    status = None
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                status = json.load(response)
+        except urllib.error.HTTPError as e:
+            # 503 while loading
+            status = json.load(e)
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass
+        if status is not None and (status.get('ready') or status.get('detector') == 'failed'):
+            break
+        time.sleep(0.2)
+    return status
+
+
+def _tree_rss_bytes(pid):
+    """
+    Resident memory of a process and all its descendants (the server and its
+    simulation workers), from /proc. None where /proc is unavailable.
+    """
+    try:
+        children = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # The command name may contain spaces; fields after it are fixed
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    except OSError:
+        return None
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/statm') as f:
+                total += int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            pass # Exited meanwhile
+    return total
+
+
+class _RssSampler:
+    """Polls the RSS of a process tree in the background and keeps the peak"""
+
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak = _tree_rss_bytes(pid)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = _tree_rss_bytes(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+
+    def __enter__(self):
+        if self.peak is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+async def _run_client(url, jpeg, num_frames, latencies):
+    import websockets
+    from protocol import pack_frame
+
+    async with websockets.connect(url, max_size=None) as ws:
+        session = json.loads(await ws.recv())
+        for seq in range(num_frames):
+            start = time.perf_counter()
+            await ws.send(pack_frame(session['number'], seq, 6, jpeg))
+            # Streamed "odds" refinements may arrive in between; wait for this frame's result
+            while True:
+                message = json.loads(await ws.recv())
+                if message.get('type') == 'result' and message.get('seq') == seq:
+                    break
+            latencies.append(time.perf_counter() - start)
+
+
+async def _run_clients(url, jpeg, clients, num_frames):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[_run_client(url, jpeg, num_frames, latencies) for _ in range(clients)])
+    return latencies, time.perf_counter() - start
+
+
+def bench_websocket(args, rng):
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        return [metric('websocket', 'skipped', 0, '', skipped="websockets is not installed")]
+
+    frames = load_frames(args.frames)
+    if not frames:
+        return [metric('websocket', 'skipped', 0, '', skipped=f"no frames in {args.frames}")]
+    jpeg = cv2.imencode('.jpg', frames[0], [cv2.IMWRITE_JPEG_QUALITY, 60])[1].tobytes()
+
+    server = None
+    url = args.url
+    if url is None:
+        port = _free_port()
+        server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'server:app', '--port', str(port),
+                                   '--log-level', 'error'], cwd=os.path.dirname(os.path.abspath(__file__)))
+        # Measure the loaded model, not the 503 window while it loads
+        status = _wait_until_ready(port, timeout=120)
+        if not (status and status.get('ready')):
+            server.kill()
+            server.wait()
+            return [metric('websocket', 'skipped', 0, '', skipped=f"server not ready: {status}")]
+        url = f"ws://127.0.0.1:{port}/ws"
+
+    rss = None
+    try:
+        if server is not None:
+            with _RssSampler(server.pid) as sampler:
+                latencies, elapsed = asyncio.run(_run_clients(url, jpeg, args.clients, args.ws_frames))
+            rss = sampler.peak
+        else:
+            latencies, elapsed = asyncio.run(_run_clients(url, jpeg, args.clients, args.ws_frames))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = [
+        metric('websocket', 'frame_p50_ms', _percentile_ms(latencies, 50), 'ms', clients=args.clients),
+        metric('websocket', 'frame_p95_ms', _percentile_ms(latencies, 95), 'ms', clients=args.clients),
+        metric('websocket', 'frames_per_sec', len(latencies) / elapsed, 'frames/s', 'higher', clients=args.clients),
+    ]
+    if rss is not None:
+        # Peak of the summed RSS of the server and its simulation workers while serving
+        results.append(metric('websocket', 'server_peak_rss_mb', rss / 2 ** 20, 'MB'))
+    elif server is not None:
+        # No /proc: only the largest single reaped child's peak is available
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        peak = peak if platform.system() == 'Darwin' else peak * 1024
+        results.append(metric('websocket', 'server_max_child_peak_rss_mb', peak / 2 ** 20, 'MB'))
+    return results
+
+
+BENCHMARKS = {
+    'evaluator': bench_evaluator,
+    'simulation': bench_simulation,
+    'pipeline': bench_pipeline,
+    'detector': bench_detector,
+    'websocket': bench_websocket,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    results = []
+    for suite in args.suites:
+        print(f"Running {suite}...", file=sys.stderr)
+        # Each suite gets its own stream so adding or skipping suites doesn't shift the others
+        rng = np.random.default_rng([args.seed, SUITES.index(suite)])
+        results.extend(BENCHMARKS[suite](args, rng))
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak if platform.system() == 'Darwin' else peak * 1024
+    results.append(metric('process', 'peak_rss_mb', peak / 2 ** 20, 'MB'))
+
+    return {
+        "meta": {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "suites": args.suites
+        },
+        "results": results
+    }
+
+
+def compare(baseline_path, current_path, threshold):
+    """Prints the change of every shared metric. Returns True if nothing regressed past `threshold`."""
+    with open(baseline_path) as f:
+        baseline = {(m['suite'], m['name']): m for m in json.load(f)['results']}
+    with open(current_path) as f:
+        current = {(m['suite'], m['name']): m for m in json.load(f)['results']}
+
+    ok = True
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key]['value'], current[key]['value']
+        if not before:
+            continue
+        change = (after - before) / before
+        worse = change < -threshold if current[key]['better'] == 'higher' else change > threshold
+        ok = ok and not worse
+        print(f"{'REGRESSION' if worse else 'ok':<10} {key[0]}.{key[1]}: "
+              f"{before:.4g} -> {after:.4g} {current[key]['unit']} ({change:+.1%})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the poker odds pipeline")
+    parser.add_argument('--suites', default=','.join(s for s in SUITES if s != 'websocket'),
+                        help=f"comma separated subset of {','.join(SUITES)}")
+    parser.add_argument('--output', help="write results as JSON here instead of stdout")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--hands', type=int, default=1000000, help="hands for the evaluator suite")
+    parser.add_argument('--pipeline-frames', type=int, default=60)
+    parser.add_argument('--model', default='yolov8s_playing_cards.pt', help="detector model for the detector suite")
+    parser.add_argument('--frames', default=DEFAULT_FRAMES, help="recorded frame image or directory of images")
+    parser.add_argument('--url', help="websocket URL of a running server (default: start one locally)")
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--ws-frames', type=int, default=20, help="frames sent by each websocket client")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'))
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(args.compare[0], args.compare[1], args.threshold) else 1)
+
+    args.suites = [s.strip() for s in args.suites.split(',') if s.strip()]
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
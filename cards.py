@@ -0,0 +1,38 @@
+from treys import Card
+
+# Compact card indices used by the vectorized code paths.
+# index = rank * 4 + suit, rank 0..12 (2..A), suit 0..3 (s, h, d, c)
+RANKS = '23456789TJQKA'
+SUITS = 'shdc'
+NUM_CARDS = 52
+
+_TREYS_SUIT_TO_INDEX = {1: 0, 2: 1, 4: 2, 8: 3}
+
+# Lookup tables between treys ints and indices
+INDEX_TO_TREYS = [Card.new(RANKS[i // 4] + SUITS[i % 4]) for i in range(NUM_CARDS)]
+TREYS_TO_INDEX = {c: i for i, c in enumerate(INDEX_TO_TREYS)}
+# Detector labels ('Ah', 'Td', ...) to indices
+LABEL_TO_INDEX = {RANKS[i // 4] + SUITS[i % 4]: i for i in range(NUM_CARDS)}
+
+
+def card_to_index(card):
+    """Converts a treys card int to a 0..51 index"""
+    return Card.get_rank_int(card) * 4 + _TREYS_SUIT_TO_INDEX[Card.get_suit_int(card)]
+
+
+def index_to_card(index):
+    """Converts a 0..51 index back to a treys card int"""
+    return INDEX_TO_TREYS[index]
+
+
+def str_to_index(label):
+    """Converts a label like 'Ah' to a 0..51 index"""
+    return RANKS.index(label[0].upper()) * 4 + SUITS.index(label[1].lower())
+
+
+def index_to_str(index):
+    return RANKS[index // 4] + SUITS[index % 4]
+
+
+def cards_to_indices(cards):
+    return [TREYS_TO_INDEX[c] for c in cards]
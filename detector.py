@@ -1,18 +1,214 @@
-from ultralytics import YOLO
+import ast
+import threading
+import time
+
+import cv2
+import numpy as np
+
+DEFAULT_MODEL = 'yolov8s_playing_cards.pt'
+
+# Inference backends, picked from the model file by default:
+# - torch: the ultralytics .pt model
+# - onnx: an exported (optionally int8-quantized) .onnx model on ONNX Runtime
+# - openvino: an OpenVINO IR (.xml) model, see export_detector.py
+BACKENDS = ('torch', 'onnx', 'openvino')
+
+# Padding colour of letterboxed inputs (what ultralytics trains with)
+LETTERBOX_COLOR = (114, 114, 114)
+
+
+def backend_for(model_path):
+    if model_path.endswith('.onnx'):
+        return 'onnx'
+    if model_path.endswith('.xml'):
+        return 'openvino'
+    return 'torch'
+
+
+def letterbox(frame, size):
+    """
+    Resizes a BGR frame to fit a size x size square (keeping its aspect
+    ratio), pads the rest and converts it to a normalized RGB CHW tensor.
+    Returns (tensor, scale, (pad_x, pad_y)).
+    """
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    image = cv2.copyMakeBorder(frame, pad_y, size - new_h - pad_y, pad_x, size - new_w - pad_x,
+                               cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+    tensor = image[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return tensor, scale, (pad_x, pad_y)
+
+
+def decode_output(output, conf, iou, scale, pad, frame_shape):
+    """
+    Turns one raw YOLOv8 output (4 + num_classes, anchors), boxes as
+    centre/size in input pixels, into (xyxy, conf, cls) arrays in frame
+    coordinates, with per-class NMS.
+    """
+    scores = output[4:]
+    cls = scores.argmax(axis=0)
+    best = scores[cls, np.arange(scores.shape[1])]
+    keep = best >= conf
+    if not keep.any():
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64)
+
+    cx, cy, bw, bh = output[:4, keep]
+    cls, best = cls[keep], best[keep]
+    indices = cv2.dnn.NMSBoxesBatched(np.stack([cx - bw / 2, cy - bh / 2, bw, bh], axis=1).tolist(),
+                                      best.tolist(), cls.tolist(), conf, iou)
+    indices = np.array(indices, dtype=np.int64).reshape(-1)
+
+    h, w = frame_shape[:2]
+    boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)[indices]
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad[0]) / scale).clip(0, w)
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad[1]) / scale).clip(0, h)
+    return boxes, best[indices], cls[indices]
+
+
+class TorchBackend:
+    def __init__(self, model_path):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def predict(self, frames, imgsz, conf, iou):
+        results = self.model(frames, verbose=False, conf=conf, iou=iou, imgsz=imgsz)
+        return [(r.boxes.xyxy.cpu().numpy(), r.boxes.conf.cpu().numpy(), r.boxes.cls.cpu().numpy().astype(np.int64))
+                for r in results]
+
+
+class ExportedBackend:
+    """
+    Shared pre/post-processing for exported models: letterboxing, batching
+    and decoding happen here, subclasses only run the network.
+    """
+    # Set by subclasses from the model's input shape (None when dynamic)
+    fixed_size = None
+    fixed_batch = None
+
+    def predict(self, frames, imgsz, conf, iou):
+        size = self.fixed_size or imgsz
+        prepared = [letterbox(frame, size) for frame in frames]
+        step = self.fixed_batch or len(prepared)
+        outputs = []
+        for start in range(0, len(prepared), step):
+            batch = np.stack([tensor for tensor, _, _ in prepared[start:start + step]])
+            outputs.extend(self._run(batch))
+        return [decode_output(output, conf, iou, scale, pad, frame.shape)
+                for output, (_, scale, pad), frame in zip(outputs, prepared, frames)]
+
+    def _run(self, batch):
+        raise NotImplementedError
+
+
+class OnnxBackend(ExportedBackend):
+    def __init__(self, model_path):
+        import onnxruntime
+        self.session = onnxruntime.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, _ = model_input.shape
+        self.fixed_batch = batch if isinstance(batch, int) else None
+        self.fixed_size = height if isinstance(height, int) else None
+        # ultralytics stores the class names as a dict literal in the model metadata
+        names = self.session.get_modelmeta().custom_metadata_map.get('names')
+        if names is None:
+            raise ValueError(f"{model_path} has no class names in its metadata")
+        self.names = ast.literal_eval(names)
+
+    def _run(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoBackend(ExportedBackend):
+    def __init__(self, model_path):
+        import openvino
+        core = openvino.Core()
+        model = core.read_model(model_path)
+        if not model.has_rt_info(['model_info', 'names']):
+            raise ValueError(f"{model_path} has no class names (export it with export_detector.py)")
+        self.names = ast.literal_eval(str(model.get_rt_info(['model_info', 'names'])))
+        shape = model.input(0).get_partial_shape()
+        self.fixed_batch = shape[0].get_length() if shape[0].is_static else None
+        self.fixed_size = shape[2].get_length() if shape[2].is_static else None
+        self.compiled = core.compile_model(model, 'CPU', {'PERFORMANCE_HINT': 'LATENCY'})
+
+    def _run(self, batch):
+        return self.compiled(batch)[self.compiled.output(0)]
+
+
+_BACKEND_CLASSES = {
+    'torch': TorchBackend,
+    'onnx': OnnxBackend,
+    'openvino': OpenVinoBackend,
+}
+
 
 class CardDetector:
-    def __init__(self, model_path='yolov8s_playing_cards.pt'):
+    def __init__(self, model_path=DEFAULT_MODEL, backend=None, lazy=False):
+        """
+        model_path: ultralytics .pt, exported .onnx or OpenVINO .xml model
+        backend: one of BACKENDS (default: picked from the model file)
+        lazy: don't load the model yet; call load() or load_async() later.
+              Until it is loaded, detection returns no cards.
+        """
+        self.model_path = model_path
+        self.backend = backend or backend_for(model_path)
+        if self.backend not in _BACKEND_CLASSES:
+            raise ValueError(f"Unknown detector backend: {self.backend}")
+        self.model = None
+        self.names = {}
+        # 'unloaded' -> 'loading' -> 'ready' or 'failed'
+        self.status = 'unloaded'
+        self.error = None
+        self.load_seconds = None
+
+        # Detection settings
+        self.confidence_threshold = 0.5  # Only accept high-confidence detections
+        self.iou_threshold = 0.5  # For removing overlapping boxes
+        self.input_size = 640  # Model input resolution; larger frames are downscaled before inference
+
+        if not lazy:
+            self.load()
+
+    @property
+    def ready(self):
+        return self.status == 'ready'
+
+    def load(self):
+        """
+        Loads the model and runs one warmup inference (the first forward pass
+        allocates buffers and picks kernels). The model is only published once
+        warm, so a detect thread never shares it with the warmup.
+        Returns True on success.
+        """
+        self.status = 'loading'
+        start = time.perf_counter()
         try:
-            self.model = YOLO(model_path)
+            model = _BACKEND_CLASSES[self.backend](self.model_path)
+            blank = np.zeros((self.input_size, self.input_size, 3), dtype=np.uint8)
+            model.predict([blank], self.input_size, self.confidence_threshold, self.iou_threshold)
             # Ensure model names are loaded
-            self.names = self.model.names
+            self.names = model.names
+            self.model = model
+            self.status = 'ready'
         except Exception as e:
             print(f"Error loading model: {e}")
-            self.model = None
-        
-        # Detection settings
-        self.confidence_threshold = 0.5  # Only accept high-confidence detections
-        self.iou_threshold = 0.5  # For removing overlapping boxes
+            self.error = str(e)
+            self.status = 'failed'
+        self.load_seconds = time.perf_counter() - start
+        return self.model is not None
+
+    def load_async(self):
+        """Loads the model on a background thread; returns the thread"""
+        self.status = 'loading'
+        thread = threading.Thread(target=self.load, name="model-load", daemon=True)
+        thread.start()
+        return thread
 
     def detect(self, frame):
         """
@@ -24,37 +220,55 @@ class CardDetector:
             return detected_cards
 
         # Run inference with built-in NMS
-        results = self.model(frame, verbose=False, conf=self.confidence_threshold, iou=self.iou_threshold)
-        
+        results = self.model.predict([frame], self.input_size, self.confidence_threshold, self.iou_threshold)
+
+        return self._parse_result(results[0])
+
+    def detect_batch(self, frames):
+        """
+        Detects cards in several frames with one batched forward pass.
+        Returns one list of detections (same format as detect) per frame.
+        """
+        if self.model is None or not frames:
+            return [[] for _ in frames]
+
+        frames = list(frames)
+        results = self.model.predict(frames, self._inference_size(frames), self.confidence_threshold,
+                                     self.iou_threshold)
+        return [self._parse_result(result) for result in results]
+
+    def _inference_size(self, frames):
+        """
+        Smallest stride-aligned model input that fits the batch, capped at input_size,
+        so small crops (see preprocess.py) aren't upscaled to the full input size
+        """
+        longest = max(max(f.shape[:2]) for f in frames)
+        return min(self.input_size, -(-longest // 32) * 32)
+
+    def _parse_result(self, result):
         raw_detections = []
-        for result in results:
-            for box in result.boxes:
-                cls_id = int(box.cls[0])
-                conf = float(box.conf[0])
-                
-                label = self.names[cls_id]
-                
-                # Convert label to Treys format
-                treys_label = self._convert_to_treys(label)
-                
-                if treys_label:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    raw_detections.append({
-                        'label': treys_label,
-                        'conf': conf,
-                        'bbox': (x1, y1, x2, y2)
-                    })
-        
+        for xyxy, conf, cls_id in zip(*result):
+            label = self.names[int(cls_id)]
+
+            # Convert label to Treys format
+            treys_label = self._convert_to_treys(label)
+
+            if treys_label:
+                x1, y1, x2, y2 = map(int, xyxy)
+                raw_detections.append({
+                    'label': treys_label,
+                    'conf': float(conf),
+                    'bbox': (x1, y1, x2, y2)
+                })
+
         # Deduplicate: If the same card label appears multiple times, keep only highest confidence
         seen_labels = {}
         for det in raw_detections:
             label = det['label']
             if label not in seen_labels or det['conf'] > seen_labels[label]['conf']:
                 seen_labels[label] = det
-        
-        detected_cards = list(seen_labels.values())
-        
-        return detected_cards
+
+        return list(seen_labels.values())
 
     def _convert_to_treys(self, label):
         """
@@ -63,15 +277,15 @@ class CardDetector:
         """
         if len(label) < 2:
             return None
-        
+
         rank = label[:-1]
         suit = label[-1]
-        
+
         # Mapping ranks
         if rank == '10':
             rank = 'T'
-        
+
         # Mapping suits
         suit = suit.lower()
-        
+
         return f"{rank}{suit}"
@@ -0,0 +1,153 @@
+"""
+Compares detector backends on a labeled frame set: accuracy and latency.
+
+    python detector_accuracy.py --frames recordings/labeled \\
+        --candidate yolov8s_playing_cards_int8.onnx --candidate yolov8s_playing_cards_int8.xml
+
+The frame directory holds images and a labels.json mapping each file name
+to the cards visible in it ({"0001.jpg": ["Ah", "Kh", "Qd"], ...}). Every
+model is scored on card-level precision/recall/F1 against the labels, and
+on agreement (F1, box IoU) with the reference model, which also stands in
+for the labels when there is no labels.json. Exits with status 1 if a
+candidate's F1 is more than --max-f1-drop below the reference's.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from detector import DEFAULT_MODEL, CardDetector
+from sources import IMAGE_EXTENSIONS
+
+
+def load_labeled_frames(directory, labels_path=None):
+    """Returns [(name, frame)] and {name: set of labels} (None without labels)"""
+    labels_path = labels_path or os.path.join(directory, 'labels.json')
+    labels = None
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = {name: set(cards) for name, cards in json.load(f).items()}
+
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS) or (labels is not None and name not in labels):
+            continue
+        frame = cv2.imread(os.path.join(directory, name))
+        if frame is None:
+            print(f"Skipping unreadable image: {name}")
+            continue
+        frames.append((name, frame))
+    return frames, labels
+
+
+def box_iou(a, b):
+    w = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def card_scores(predicted, expected):
+    """Micro-averaged card-level scores over frames; both are lists of label sets"""
+    tp = sum(len(p & e) for p, e in zip(predicted, expected))
+    fp = sum(len(p - e) for p, e in zip(predicted, expected))
+    fn = sum(len(e - p) for p, e in zip(predicted, expected))
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    exact = sum(p == e for p, e in zip(predicted, expected)) / len(expected) if expected else 1.0
+    return {"precision": precision, "recall": recall, "f1": f1, "frame_accuracy": exact}
+
+
+def run_model(model_path, frames):
+    """Detections per frame and per-frame latencies (after one warmup frame)"""
+    start = time.perf_counter()
+    detector = CardDetector(model_path)
+    load_seconds = time.perf_counter() - start
+    if detector.model is None:
+        raise ValueError(f"could not load {model_path}")
+
+    detector.detect(frames[0][1])
+    detections, timings = [], []
+    for _, frame in frames:
+        start = time.perf_counter()
+        detections.append(detector.detect(frame))
+        timings.append(time.perf_counter() - start)
+    return detector.backend, detections, timings, load_seconds
+
+
+def evaluate(model_path, frames, labels, reference):
+    backend, detections, timings, load_seconds = run_model(model_path, frames)
+    predicted = [{d['label'] for d in dets} for dets in detections]
+    result = {"model": model_path, "backend": backend, "load_s": load_seconds,
+              "p50_ms": float(np.percentile(timings, 50)) * 1000,
+              "p95_ms": float(np.percentile(timings, 95)) * 1000}
+    if reference is None:
+        reference = detections
+    expected = [labels[name] for name, _ in frames] if labels is not None else \
+        [{d['label'] for d in dets} for dets in reference]
+    result.update(card_scores(predicted, expected))
+
+    # Agreement with the reference model, box by box for labels both found
+    agreement = card_scores(predicted, [{d['label'] for d in dets} for dets in reference])
+    ious = []
+    for dets, ref in zip(detections, reference):
+        ref_boxes = {d['label']: d['bbox'] for d in ref}
+        ious.extend(box_iou(d['bbox'], ref_boxes[d['label']]) for d in dets if d['label'] in ref_boxes)
+    result["agreement_f1"] = agreement["f1"]
+    result["mean_iou"] = float(np.mean(ious)) if ious else 0.0
+    return result, detections
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and latency of detector backends on labeled frames")
+    parser.add_argument('--frames', required=True, help="directory of frames (with labels.json)")
+    parser.add_argument('--labels', help="labels file (default: FRAMES/labels.json)")
+    parser.add_argument('--reference', default=DEFAULT_MODEL, help="reference model (the PyTorch model)")
+    parser.add_argument('--candidate', action='append', default=[], help="model to compare; repeatable")
+    parser.add_argument('--max-f1-drop', type=float, default=0.02,
+                        help="largest acceptable F1 loss of a candidate versus the reference")
+    parser.add_argument('--output', help="write results as JSON here")
+    args = parser.parse_args()
+
+    frames, labels = load_labeled_frames(args.frames, args.labels)
+    if not frames:
+        parser.error(f"no frames in {args.frames}")
+    if labels is None:
+        print("No labels found: scoring against the reference model's detections")
+
+    results = []
+    reference_result, reference = evaluate(args.reference, frames, labels, None)
+    results.append(reference_result)
+    failed = []
+    for path in args.candidate:
+        result, _ = evaluate(path, frames, labels, reference)
+        result["f1_drop"] = reference_result["f1"] - result["f1"]
+        result["speedup"] = reference_result["p50_ms"] / result["p50_ms"] if result["p50_ms"] else 0.0
+        results.append(result)
+        if result["f1_drop"] > args.max_f1_drop:
+            failed.append(path)
+
+    print(f"{len(frames)} frames")
+    print(f"{'model':40s} {'backend':9s} {'F1':>6s} {'prec':>6s} {'recall':>6s} {'frames':>6s} "
+          f"{'agree':>6s} {'IoU':>5s} {'p50 ms':>7s} {'load s':>6s}")
+    for r in results:
+        print(f"{os.path.basename(r['model']):40s} {r['backend']:9s} {r['f1']:6.3f} {r['precision']:6.3f} "
+              f"{r['recall']:6.3f} {r['frame_accuracy']:6.3f} {r['agreement_f1']:6.3f} {r['mean_iou']:5.2f} "
+              f"{r['p50_ms']:7.1f} {r['load_s']:6.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    for path in failed:
+        print(f"FAIL: {path} loses more than {args.max_f1_drop} F1 against {args.reference}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
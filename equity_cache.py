@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict
+from itertools import permutations
+
+# All 24 ways to relabel the 4 suits
+_SUIT_PERMUTATIONS = list(permutations(range(4)))
+
+
+def canonicalize(hero, board, num_players):
+    """
+    Canonical key for a spot given as card indices (see cards.py).
+    Suit-isomorphic spots (e.g. AhKh on Qh7h2c and AsKs on Qs7s2d) and
+    different orderings of the same cards map to the same key.
+    """
+    best = None
+    for perm in _SUIT_PERMUTATIONS:
+        mapped_hero = tuple(sorted(c - c % 4 + perm[c % 4] for c in hero))
+        mapped_board = tuple(sorted(c - c % 4 + perm[c % 4] for c in board))
+        candidate = (mapped_hero, mapped_board)
+        if best is None or candidate < best:
+            best = candidate
+    return (num_players,) + best
+
+
+class EquityCache:
+    """
+    Bounded LRU cache of odds results keyed by canonical game state.
+    Thread-safe so one cache can be shared by every session's engine.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,77 @@
+import itertools
+from math import comb
+
+import numpy as np
+
+from cards import NUM_CARDS
+from hand_evaluator import get_evaluator
+from vector_sim import remaining_deck
+
+
+def count_combinations(num_board, num_opponents, num_known=2):
+    """
+    Number of (board runout, ordered opponent holdings) combinations that
+    exact enumeration has to score for a spot.
+    """
+    available = NUM_CARDS - num_known - num_board
+    board_needed = 5 - num_board
+    total = comb(available, board_needed)
+    available -= board_needed
+    for _ in range(num_opponents):
+        total *= comb(available, 2)
+        available -= 2
+    return total
+
+
+def _count_disjoint(pair_masks, k):
+    """Counts ordered k-tuples of pairwise disjoint hands (given as card bitmasks)"""
+    if k == 0:
+        return 1
+    used = pair_masks
+    for _ in range(k - 1):
+        extended = used[:, None] | pair_masks[None, :]
+        disjoint = (used[:, None] & pair_masks[None, :]) == 0
+        used = extended[disjoint]
+    return len(used)
+
+
+def enumerate_equity(hero, board, num_opponents, available=None):
+    """
+    Exact equity by scoring every board runout against every ordered set of
+    opponent holdings.
+    hero, board: lists of card indices (see cards.py)
+    available: the remaining deck if the caller has it (HandState.deck())
+    Returns (wins, ties, total) counts.
+    """
+    if available is None:
+        available = remaining_deck(hero, board)
+    board_needed = 5 - len(board)
+
+    evaluator = get_evaluator()
+    wins = ties = total = 0
+    for fill in itertools.combinations(range(len(available)), board_needed):
+        rest = np.delete(available, fill)
+        full_board = np.concatenate([board, available[list(fill)]]).astype(np.int64)
+
+        hero_rank = evaluator.evaluate(np.concatenate([full_board, hero]).tolist())
+
+        first, second = np.triu_indices(len(rest), 1)
+        holes = np.stack([rest[first], rest[second]], axis=1)
+        opp_hands = np.concatenate([np.broadcast_to(full_board, (len(holes), 5)), holes], axis=1)
+        opp_ranks = evaluator.evaluate_batch(opp_hands)
+
+        if num_opponents == 1:
+            wins += int(np.count_nonzero(opp_ranks > hero_rank))
+            ties += int(np.count_nonzero(opp_ranks == hero_rank))
+            total += len(opp_ranks)
+            continue
+
+        # Multiway: count disjoint opponent tuples that stay below (or level with) hero
+        masks = (np.uint64(1) << holes[:, 0].astype(np.uint64)) | (np.uint64(1) << holes[:, 1].astype(np.uint64))
+        below = _count_disjoint(masks[opp_ranks > hero_rank], num_opponents)
+        not_above = _count_disjoint(masks[opp_ranks >= hero_rank], num_opponents)
+        wins += below
+        ties += not_above - below
+        total += _count_disjoint(masks, num_opponents)
+
+    return wins, ties, total
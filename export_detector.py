@@ -0,0 +1,121 @@
+"""
+Exports the card detector for the CPU inference backends (see detector.py).
+
+    python export_detector.py --calibration recordings/frames
+    python export_detector.py --format openvino --calibration recordings/frames
+
+The ultralytics model is exported to ONNX (dynamic batch and input size),
+then quantized to int8 with a few hundred real frames as calibration data:
+static QDQ quantization on ONNX Runtime, or NNCF post-training
+quantization for OpenVINO. Check what it costs with detector_accuracy.py
+before switching the server over (DETECTOR_MODEL in server.py).
+
+Optional dependencies: onnx and onnxruntime, plus openvino and nncf for
+--format openvino. Serving only needs onnxruntime or openvino.
+"""
+import argparse
+import itertools
+import os
+
+import numpy as np
+
+from detector import DEFAULT_MODEL, letterbox
+from sources import read_frames
+
+DEFAULT_CALIBRATION_FRAMES = 300
+
+
+def calibration_tensors(source, size, limit):
+    """Letterboxed (1, 3, size, size) inputs from a video file or image directory"""
+    for frame in itertools.islice(read_frames(source), limit):
+        yield letterbox(frame, size)[0][np.newaxis]
+
+
+def export_onnx(model_path, output, imgsz):
+    from ultralytics import YOLO
+    exported = YOLO(model_path).export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True)
+    if exported != output:
+        os.replace(exported, output)
+    return output
+
+
+def quantize_onnx(fp32_path, output, calibration):
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.input_name = input_name
+            self.tensors = iter(calibration)
+
+        def get_next(self):
+            tensor = next(self.tensors, None)
+            return None if tensor is None else {self.input_name: tensor}
+
+    import onnx
+    model = onnx.load(fp32_path)
+    input_name = model.graph.input[0].name
+    names = {p.key: p.value for p in model.metadata_props}
+
+    preprocessed = output + '.prep.onnx'
+    quant_pre_process(fp32_path, preprocessed)
+    try:
+        quantize_static(preprocessed, output, FrameReader(input_name), quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True)
+    finally:
+        os.remove(preprocessed)
+
+    # Quantization drops the metadata; the backend reads the class names from it
+    quantized = onnx.load(output)
+    onnx.helper.set_model_props(quantized, names)
+    onnx.save(quantized, output)
+    return output
+
+
+def export_openvino(fp32_path, output, calibration, int8):
+    import ast
+    import onnx
+    import openvino
+
+    names = {p.key: p.value for p in onnx.load(fp32_path).metadata_props}['names']
+    model = openvino.convert_model(fp32_path)
+    if int8:
+        import nncf
+        model = nncf.quantize(model, nncf.Dataset(list(calibration)), preset=nncf.QuantizationPreset.MIXED)
+    model.set_rt_info(str(ast.literal_eval(names)), ['model_info', 'names'])
+    openvino.save_model(model, output)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the card detector to ONNX / OpenVINO, int8 by default")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="ultralytics .pt model")
+    parser.add_argument('--format', choices=('onnx', 'openvino'), default='onnx')
+    parser.add_argument('--output', help="output path (default: next to the model, e.g. *_int8.onnx)")
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--calibration', help="video file or image directory of representative frames")
+    parser.add_argument('--calibration-frames', type=int, default=DEFAULT_CALIBRATION_FRAMES)
+    parser.add_argument('--no-int8', dest='int8', action='store_false', help="export float32 only")
+    args = parser.parse_args()
+
+    if args.int8 and not args.calibration:
+        parser.error("int8 quantization needs --calibration frames (or pass --no-int8)")
+
+    stem = os.path.splitext(args.model)[0]
+    suffix = '_int8' if args.int8 else ''
+    output = args.output or f"{stem}{suffix}.{'onnx' if args.format == 'onnx' else 'xml'}"
+    calibration = calibration_tensors(args.calibration, args.imgsz, args.calibration_frames) if args.int8 else None
+
+    fp32_path = export_onnx(args.model, f"{stem}.onnx", args.imgsz)
+    if args.format == 'onnx':
+        if args.int8:
+            quantize_onnx(fp32_path, output, calibration)
+        elif fp32_path != output:
+            os.replace(fp32_path, output)
+    else:
+        export_openvino(fp32_path, output, calibration, args.int8)
+    print(f"Exported {output}")
+
+
+if __name__ == "__main__":
+    main()
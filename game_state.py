@@ -0,0 +1,76 @@
+"""
+Compact hand state: card indices plus 52-bit masks.
+
+A HandState is never modified in place. Changing the hero hand or board
+builds a new one, so a worker thread can hold on to a snapshot while the
+frame loop keeps updating the engine. Membership tests are a bit test, and
+the remaining deck is computed once per state, by removing only the newly
+dealt cards from the previous state's deck where possible.
+"""
+import numpy as np
+
+from cards import NUM_CARDS
+
+ALL_CARDS = np.arange(NUM_CARDS, dtype=np.int64)
+
+
+def cards_to_mask(indices):
+    mask = 0
+    for index in indices:
+        mask |= 1 << index
+    return mask
+
+
+def mask_to_indices(mask):
+    return [i for i in range(NUM_CARDS) if mask >> i & 1]
+
+
+class HandState:
+    __slots__ = ('hero', 'board', 'hero_mask', 'board_mask', 'dead_mask', '_deck', '_parent')
+
+    def __init__(self, hero=(), board=(), parent=None):
+        """hero, board: card indices (cards.py), in the order they were dealt"""
+        self.hero = tuple(hero)
+        self.board = tuple(board)
+        self.hero_mask = cards_to_mask(self.hero)
+        self.board_mask = cards_to_mask(self.board)
+        self.dead_mask = self.hero_mask | self.board_mask
+        self._deck = None
+        # Kept only until the deck is built, to derive it incrementally
+        self._parent = parent
+
+    def with_hero(self, hero):
+        hero = tuple(hero)
+        return self if hero == self.hero else HandState(hero, self.board, self._deck_parent())
+
+    def with_board(self, board):
+        board = tuple(board)
+        return self if board == self.board else HandState(self.hero, board, self._deck_parent())
+
+    def _deck_parent(self):
+        # Only a state with a built deck is worth linking to (and chains stay one long)
+        return self if self._deck is not None else None
+
+    def contains(self, index):
+        return bool(self.dead_mask >> index & 1)
+
+    @property
+    def key(self):
+        """Hashable identity of the state (card order doesn't matter)"""
+        return self.hero_mask, self.board_mask
+
+    def deck(self):
+        """Sorted int64 array of the cards not in the hero hand or on the board"""
+        if self._deck is None:
+            parent = self._parent
+            self._parent = None
+            if parent is not None and parent.dead_mask & ~self.dead_mask == 0:
+                # Only cards were added: drop them from the previous deck
+                added = self.dead_mask & ~parent.dead_mask
+                deck = parent._deck[np.isin(parent._deck, mask_to_indices(added), invert=True)] if added else parent._deck
+            else:
+                keep = np.array([not self.dead_mask >> i & 1 for i in range(NUM_CARDS)])
+                deck = ALL_CARDS[keep]
+            deck.flags.writeable = False
+            self._deck = deck
+        return self._deck
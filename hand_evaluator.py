@@ -0,0 +1,151 @@
+import itertools
+import os
+
+import numpy as np
+from treys import Card
+from treys.lookup import LookupTable
+
+# Additive per-rank keys: the sum over any 7 cards is unique for every rank
+# multiset, so it indexes the non-flush table directly (a perfect hash).
+RANK_KEYS = [0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181]
+# Per-suit keys: the sum over 7 cards encodes the count of every suit (3 bits each)
+SUIT_KEYS = [1, 8, 64, 512]
+
+RANK_TABLE_SIZE = 4 * RANK_KEYS[12] + 3 * RANK_KEYS[11] + 1
+SUIT_TABLE_SIZE = 7 * SUIT_KEYS[3] + 1
+
+DEFAULT_TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+TABLE_FILES = {
+    'rank': 'rank7.npy',
+    'flush': 'flush.npy',
+    'flush_suit': 'flush_suit.npy',
+}
+
+_RANK_KEYS = np.array(RANK_KEYS, dtype=np.int32)
+_SUIT_KEYS = np.array(SUIT_KEYS, dtype=np.int32)
+_RANK_BITS = 1 << np.arange(13, dtype=np.int32)
+
+
+def _prime_product(ranks):
+    product = 1
+    for r in ranks:
+        product *= Card.PRIMES[r]
+    return product
+
+
+def build_tables():
+    """
+    Builds the lookup tables from the treys 5-card tables. Values are treys
+    hand ranks (1 = royal flush ... 7462 = 7-5-4-3-2 offsuit), so results
+    match treys.Evaluator exactly.
+    """
+    lookup = LookupTable()
+
+    # Best non-flush 5-card rank for every 7-card rank multiset
+    rank_table = np.zeros(RANK_TABLE_SIZE, dtype=np.int16)
+    for combo in itertools.combinations_with_replacement(range(13), 7):
+        if max(combo.count(r) for r in set(combo)) > 4:
+            continue
+        best = min(lookup.unsuited_lookup[_prime_product(sub)] for sub in set(itertools.combinations(combo, 5)))
+        rank_table[sum(RANK_KEYS[r] for r in combo)] = best
+
+    # Best flush / straight flush for every mask of 5+ suited ranks
+    flush_table = np.zeros(1 << 13, dtype=np.int16)
+    for mask in range(1 << 13):
+        ranks = [r for r in range(13) if mask >> r & 1]
+        if len(ranks) >= 5:
+            flush_table[mask] = min(lookup.flush_lookup[_prime_product(sub)] for sub in itertools.combinations(ranks, 5))
+
+    # Flush suit for every suit key, -1 when no suit has 5+ cards
+    flush_suit = np.full(SUIT_TABLE_SIZE, -1, dtype=np.int8)
+    for key in range(SUIT_TABLE_SIZE):
+        for suit in range(4):
+            if key // SUIT_KEYS[suit] % 8 >= 5:
+                flush_suit[key] = suit
+
+    return {'rank': rank_table, 'flush': flush_table, 'flush_suit': flush_suit}
+
+
+def load_tables(table_dir=DEFAULT_TABLE_DIR):
+    """
+    Memory-maps the lookup tables from `table_dir`, building and saving them
+    first if they do not exist yet.
+    """
+    paths = {name: os.path.join(table_dir, filename) for name, filename in TABLE_FILES.items()}
+    if not all(os.path.exists(p) for p in paths.values()):
+        print("Building hand evaluator tables...")
+        tables = build_tables()
+        os.makedirs(table_dir, exist_ok=True)
+        for name, path in paths.items():
+            # Write then rename so concurrent processes never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, tables[name])
+            os.replace(tmp_path, path)
+
+    return {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+
+
+class HandEvaluator:
+    """
+    7-card evaluator working on card indices (see cards.py).
+    Returns treys-compatible ranks: lower is better, 1 is a royal flush.
+    """
+
+    def __init__(self, table_dir=DEFAULT_TABLE_DIR):
+        tables = load_tables(table_dir)
+        self.rank_table = tables['rank']
+        self.flush_table = tables['flush']
+        self.flush_suit = tables['flush_suit']
+        # Plain list for the scalar path, indexing numpy scalars is slow
+        self._flush_suit_list = self.flush_suit.tolist()
+
+    def evaluate(self, cards):
+        """Evaluates a single hand given as 7 card indices"""
+        rank_key = 0
+        suit_key = 0
+        for c in cards:
+            rank_key += RANK_KEYS[c >> 2]
+            suit_key += SUIT_KEYS[c & 3]
+
+        suit = self._flush_suit_list[suit_key]
+        if suit >= 0:
+            mask = 0
+            for c in cards:
+                if c & 3 == suit:
+                    mask |= 1 << (c >> 2)
+            return int(self.flush_table[mask])
+        return int(self.rank_table[rank_key])
+
+    def evaluate_batch(self, hands):
+        """
+        Evaluates an integer array of hands with shape (..., 7).
+        Returns an int16 array of ranks with shape (...).
+        """
+        hands = np.asarray(hands)
+        flat = hands.reshape(-1, 7)
+        ranks = flat >> 2
+        suits = flat & 3
+
+        result = self.rank_table[_RANK_KEYS[ranks].sum(axis=1)]
+
+        # At most one suit can hold 5+ of 7 cards; flushes always beat the non-flush hand
+        flush_suit = self.flush_suit[_SUIT_KEYS[suits].sum(axis=1)]
+        is_flush = flush_suit >= 0
+        if is_flush.any():
+            in_suit = suits[is_flush] == flush_suit[is_flush][:, None]
+            masks = (_RANK_BITS[ranks[is_flush]] * in_suit).sum(axis=1)
+            result[is_flush] = self.flush_table[masks]
+
+        return result.reshape(hands.shape[:-1])
+
+
+_evaluator = None
+
+
+def get_evaluator():
+    """Shared evaluator instance, tables are loaded on first use"""
+    global _evaluator
+    if _evaluator is None:
+        _evaluator = HandEvaluator()
+    return _evaluator
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from collections import deque
+
+
+class LatestFrameSlot:
+    """
+    Single-slot mailbox between the websocket receive loop and the frame worker.
+    A new frame replaces any frame still waiting, so the worker always picks up
+    the newest one and stale frames are dropped instead of queueing up.
+    """
+
+    def __init__(self):
+        self._pending = None
+        self._ready = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        """Stores a frame. Returns True if it replaced one that was never picked up."""
+        dropped = self._pending is not None
+        if dropped:
+            self.dropped += 1
+        self._pending = frame
+        self.received += 1
+        self._ready.set()
+        return dropped
+
+    async def get(self):
+        await self._ready.wait()
+        frame = self._pending
+        self._pending = None
+        self._ready.clear()
+        return frame
+
+
+class FrameQueue:
+    """
+    Bounded thread-safe queue between pipeline stages (see main.py).
+    When full, put() drops the oldest item (live camera: stay current) or,
+    with drop_oldest=False, blocks until there is room (replay: keep every
+    frame). close() lets get() drain what is left and then return None.
+    """
+
+    def __init__(self, maxsize=2, drop_oldest=True):
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+        self._items = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """Returns False if the queue was closed and the item discarded"""
+        with self._cond:
+            while not self.drop_oldest and len(self._items) >= self.maxsize and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self):
+        """Next item, or None once the queue is closed and empty"""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
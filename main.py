@@ -1,50 +1,139 @@
+import argparse
+import threading
+import time
+
 import cv2
-import numpy as np
-from detector import CardDetector
+from detector import DEFAULT_MODEL, CardDetector
+from ingest import FrameQueue
 from poker import PokerEngine
+from preprocess import FramePreprocessor
+from samplers import SAMPLERS
+from sources import is_live, read_frames
+from tracker import CardTracker
 from ui import draw_ui
 
-def main():
-    print("Initializing Poker Odds Calculator...")
-    
-    # Initialize components
-    detector = CardDetector()
-    poker = PokerEngine()
-    
-    # Open camera
-    cap = cv2.VideoCapture(0)
-    
-    if not cap.isOpened():
-        print("Error: Could not open camera.")
-        return
-
-    print("Press 'q' to quit.")
-    
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Can't receive frame (stream end?). Exiting ...")
+# Capture, inference, odds and rendering run on their own threads, connected
+# by small bounded queues, so camera I/O, YOLO and simulation overlap.
+QUEUE_SIZE = 2
+
+
+def capture_stage(source, out, stop, stats):
+    try:
+        for frame in read_frames(source):
+            if stop.is_set() or not out.put(frame):
+                break
+            stats['captured'] += 1
+    except ValueError as e:
+        print(f"Error: {e}")
+    finally:
+        out.close()
+
+
+def inference_stage(detector, tracker, preprocessor, inp, out):
+    # Full detection on keyframes (cropped to the card regions), tracked in between
+    detect = lambda f, scene_change: preprocessor.detect(f, detector.detect_batch, scene_change)
+    while (frame := inp.get()) is not None:
+        try:
+            cards = tracker.process(frame, detect)
+        except Exception as e:
+            print(f"Detection error: {e}")
+            continue
+        if not out.put((frame, cards)):
             break
+    out.close()
+
 
-        # Detect cards
-        cards = detector.detect(frame)
-        
-        # Update poker game state
+def odds_stage(poker, inp, out):
+    while (item := inp.get()) is not None:
+        frame, cards = item
         poker.update_state(cards)
-        
-        # Calculate odds
         odds = poker.calculate_odds()
-        
-        # Draw UI
-        frame = draw_ui(frame, cards, odds)
-
-        cv2.imshow('Poker Odds Calculator', frame)
-        
-        if cv2.waitKey(1) == ord('q'):
+        if not out.put((frame, cards, odds)):
             break
+    out.close()
+
+
+def run(args):
+    print("Initializing Poker Odds Calculator...")
+    detector = CardDetector(args.model)
+    poker = PokerEngine(time_budget=args.odds_budget, target_se=args.target_se, sampler=args.sampler)
+    poker.set_num_players(args.players)
+    tracker = CardTracker()
+    preprocessor = FramePreprocessor(input_size=detector.input_size)
+
+    # Live cameras drop the oldest frame to stay current; replays keep every frame
+    drop = is_live(args.source) if args.drop is None else args.drop
+    queues = [FrameQueue(QUEUE_SIZE, drop_oldest=drop) for _ in range(3)]
+    captured, inferred, rendered = queues
+    stop = threading.Event()
+    stats = {'captured': 0, 'rendered': 0}
+
+    threads = [
+        threading.Thread(target=capture_stage, args=(args.source, captured, stop, stats), daemon=True),
+        threading.Thread(target=inference_stage, args=(detector, tracker, preprocessor, captured, inferred), daemon=True),
+        threading.Thread(target=odds_stage, args=(poker, inferred, rendered), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    if not args.headless:
+        print("Press 'q' to quit.")
+    start = last_report = time.perf_counter()
+    try:
+        # Rendering stays on the main thread (imshow requires it on some platforms)
+        while (item := rendered.get()) is not None:
+            frame, cards, odds = item
+            stats['rendered'] += 1
+            if args.max_frames and stats['rendered'] >= args.max_frames:
+                break
+
+            if not args.headless:
+                cv2.imshow('Poker Odds Calculator', draw_ui(frame, cards, odds))
+                if cv2.waitKey(1) == ord('q'):
+                    break
+
+            now = time.perf_counter()
+            if now - last_report >= args.report_interval:
+                print(f"{stats['rendered']} frames, {stats['rendered'] / (now - start):.1f} fps")
+                last_report = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for queue in queues:
+            queue.close()
+        for thread in threads:
+            thread.join(timeout=5)
+        if not args.headless:
+            cv2.destroyAllWindows()
+
+    elapsed = time.perf_counter() - start
+    print(f"Processed {stats['rendered']}/{stats['captured']} frames in {elapsed:.1f}s "
+          f"({stats['rendered'] / elapsed if elapsed else 0:.1f} fps), "
+          f"dropped: capture {captured.dropped}, inference {inferred.dropped}, odds {rendered.dropped}, "
+          f"keyframes: {tracker.keyframes}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poker odds from a camera, video file or image directory")
+    parser.add_argument('--source', default='0', help="camera index, video file or directory of images")
+    parser.add_argument('--model', default=DEFAULT_MODEL,
+                        help="detector model: ultralytics .pt, or .onnx / OpenVINO .xml from export_detector.py")
+    parser.add_argument('--headless', action='store_true', help="no window; just process and report fps")
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--max-frames', type=int, default=0, help="stop after this many frames (0 = all)")
+    parser.add_argument('--drop', dest='drop', action='store_true', default=None,
+                        help="drop the oldest queued frame when a stage falls behind (default for cameras)")
+    parser.add_argument('--no-drop', dest='drop', action='store_false',
+                        help="block instead, processing every frame (default for files)")
+    parser.add_argument('--odds-budget', type=float, default=0.05, help="seconds of simulation per frame")
+    parser.add_argument('--target-se', type=float, default=0.5, help="stop simulating at this standard error (%%)")
+    parser.add_argument('--sampler', choices=SAMPLERS, default='random',
+                        help="Monte Carlo sampler; stratified and qmc reach --target-se with fewer evaluations")
+    parser.add_argument('--report-interval', type=float, default=5.0, help="seconds between fps reports")
+    run(parser.parse_args())
 
-    cap.release()
-    cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,156 @@
+"""
+Minimal in-process metrics with Prometheus text exposition.
+
+Recording is a lock plus a few additions, cheap enough to leave on in the
+hot path. Values that already live elsewhere (cache stats, session counts)
+are registered as callbacks and only read when /metrics is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond decode up to slow simulations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(text, quotes=True):
+    """Backslash, newline (and in label values, double quote) must be escaped"""
+    text = str(text).replace('\\', '\\\\').replace('\n', '\\n')
+    return text.replace('"', '\\"') if quotes else text
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # Unlabeled counters report 0 before their first increment
+        self._values = {} if self.labelnames else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def collect(self):
+        yield f"# HELP {self.name} {_escape(self.help, quotes=False)}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            yield f"{self.name}{_format_labels(list(zip(self.labelnames, labelvalues)))} {value}"
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [per-bucket counts (+Inf last), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def collect(self):
+        yield f"# HELP {self.name} {_escape(self.help, quotes=False)}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        for labelvalues, (counts, total, count) in items:
+            labels = list(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(labels + [('le', bound)])} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {total}"
+            yield f"{self.name}_count{_format_labels(labels)} {count}"
+
+
+class CallbackMetric:
+    """Counter or gauge whose value is read from `fn` at scrape time"""
+
+    def __init__(self, name, help, fn, kind='gauge'):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.kind = kind
+
+    def collect(self):
+        yield f"# HELP {self.name} {_escape(self.help, quotes=False)}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield f"{self.name} {self.fn()}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, fn, kind='gauge'):
+        return self.register(CallbackMetric(name, help, fn, kind))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Hot-path metrics shared by the server and the engine
+FRAMES_RECEIVED = REGISTRY.counter('poker_frames_received_total', 'Camera frames received')
+FRAMES_DROPPED = REGISTRY.counter('poker_frames_dropped_total', 'Frames replaced by a newer one before processing')
+FRAMES_PROCESSED = REGISTRY.counter('poker_frames_processed_total', 'Frames fully processed', ('keyframe',))
+STAGE_SECONDS = REGISTRY.histogram('poker_stage_seconds', 'Time spent per pipeline stage', ('stage',))
+ODDS_REQUESTS = REGISTRY.counter('poker_odds_requests_total', 'calculate_odds calls by how they were answered',
+                                 ('method',))
+SIMULATION_ITERATIONS = REGISTRY.counter('poker_simulation_iterations_total', 'Monte Carlo iterations simulated')
+INFERENCE_PIXELS = REGISTRY.counter('poker_inference_pixels_total',
+                                    'Pixels of decoded keyframes (frame) and of what the detector was given (model)',
+                                    ('kind',))
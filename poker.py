@@ -1,25 +1,148 @@
-from treys import Card, Evaluator, Deck
+import math
+import threading
+import time
+
+import numpy as np
+
+import exact
+import preflop
+import samplers
+import vector_sim
+from cards import INDEX_TO_TREYS, LABEL_TO_INDEX, cards_to_indices
+from equity_cache import EquityCache, canonicalize
+from game_state import HandState, cards_to_mask
+from hand_evaluator import get_evaluator
+from metrics import ODDS_REQUESTS, SIMULATION_ITERATIONS
+from ranges import Range, parse_range
+
+# Monte Carlo iterations per calculate_odds call for each backend
+BACKEND_ITERATIONS = {
+    'python': 1000,
+    'numpy': 50000,
+}
+
+# Chunk size for budgeted sampling: the time and precision budgets are
+# checked between chunks
+CHUNK_ITERATIONS = {
+    'python': 250,
+    'numpy': 10000,
+}
+
+# z-score of the reported confidence interval (95%)
+CONFIDENCE_Z = 1.96
+
+# Spots with at most this many (runout, opponent holdings) combinations are
+# enumerated exactly instead of sampled
+DEFAULT_EXACT_LIMIT = 100000
+
+# Repeated calls on an unchanged spot keep adding iterations up to this total
+DEFAULT_MAX_ITERATIONS = 1000000
+
+# Variance-reduced samplers only stop on target_se once this many replicates
+# are in; fewer give too rough an estimate of their own error
+MIN_REPLICATES = 10
+
+def sampling_error(count, iterations, effective=None):
+    """
+    Standard error of a sampled rate, in percentage points. Weighted
+    (range) samples pass their effective sample size.
+    """
+    if iterations == 0 or effective == 0:
+        return 100.0
+    p = count / iterations
+    return math.sqrt(p * (1 - p) / (effective or iterations)) * 100
+
+def replicate_error(win_sum, win_sq_sum, replicates):
+    """Standard error of the mean of replicate win rates (0..1), in percentage points"""
+    if replicates < 2:
+        return 100.0
+    mean = win_sum / replicates
+    variance = max(0.0, (win_sq_sum - replicates * mean * mean) / (replicates - 1))
+    return math.sqrt(variance / replicates) * 100
+
+def confidence_interval(win_rate, std_error):
+    return max(0.0, win_rate - CONFIDENCE_Z * std_error), min(100.0, win_rate + CONFIDENCE_Z * std_error)
 
 class PokerEngine:
-    def __init__(self):
-        self.evaluator = Evaluator()
-        self.deck = Deck()
-        self.hero_hand = []
-        self.community_cards = []
+    def __init__(self, backend='numpy', exact_limit=DEFAULT_EXACT_LIMIT, cache_size=4096, pool=None, seed=None, cache=None,
+                 max_iterations=DEFAULT_MAX_ITERATIONS, time_budget=None, target_se=None, sampler='random'):
+        """
+        backend: 'numpy' runs the batched vectorized simulation (vector_sim.py),
+                 'python' runs the per-iteration shuffle loop
+        exact_limit: max combinations to enumerate exactly (0 disables exact mode)
+        cache_size: max spots kept in the LRU equity cache (0 disables caching)
+        pool: optional SimulationPool (sim_pool.py) to run the numpy backend across processes
+        seed: seed for reproducible simulations
+        cache: optional EquityCache shared with other engines (overrides cache_size)
+        max_iterations: Monte Carlo iterations after which an unchanged spot is no longer refined
+        time_budget, target_se: default budgets for calculate_odds
+        sampler: 'random' for plain Monte Carlo, or one of the variance-reduced
+                 samplers in samplers.py ('stratified', 'qmc'),
+                 which run vectorized in this process (no pool) and report
+                 the standard error measured across their replicates
+        """
+        if backend not in BACKEND_ITERATIONS:
+            raise ValueError(f"Unknown backend: {backend}")
+        if sampler not in samplers.SAMPLERS:
+            raise ValueError(f"Unknown sampler: {sampler}")
+        self.sampler = sampler
+        self.backend = backend
+        self.exact_limit = exact_limit
+        # Precomputed preflop equities (None until preflop.py has been run)
+        self.preflop_table = preflop.load_table()
+        if cache is None and cache_size > 0:
+            cache = EquityCache(cache_size)
+        self.cache = cache
+        self.rng = np.random.default_rng(seed)
+        self.pool = pool
+        # Refinement of an unchanged spot stops once this many iterations are in
+        self.max_iterations = max_iterations
+        self.time_budget = time_budget
+        self.target_se = target_se
+        self._estimate = None
+        # calculate_odds runs on executor threads; a refinement that was
+        # cancelled on the event loop keeps running, so calls take turns
+        self._odds_lock = threading.Lock()
+        self._state_key = None
+        self._state_version = 0
+        # Opponent index (0 = first opponent) -> ranges.Range; missing seats hold random hands
+        self.opponent_ranges = {}
+        self._ranges_version = 0
+        self.evaluator = get_evaluator()
+        # Hero hand and board as card indices and bitmasks (game_state.py)
+        self.state = HandState()
         self.num_players = 2 
         self.hero_hand_locked = False
         self.community_locked_count = 0 
 
+    @property
+    def hero_hand(self):
+        """Hero cards as treys ints"""
+        return [INDEX_TO_TREYS[i] for i in self.state.hero]
+
+    @hero_hand.setter
+    def hero_hand(self, cards):
+        self.state = self.state.with_hero(cards_to_indices(cards))
+
+    @property
+    def community_cards(self):
+        """Board cards as treys ints"""
+        return [INDEX_TO_TREYS[i] for i in self.state.board]
+
+    @community_cards.setter
+    def community_cards(self, cards):
+        self.state = self.state.with_board(cards_to_indices(cards))
+
     def lock_hero_hand(self):
-        if len(self.hero_hand) == 2:
+        if len(self.state.hero) == 2:
             self.hero_hand_locked = True
             return True
         return False
 
     def lock_community(self):
         """Locks the currently detected community cards (max 5)"""
-        if len(self.community_cards) >= 3:
-            self.community_locked_count = len(self.community_cards)
+        if len(self.state.board) >= 3:
+            self.community_locked_count = len(self.state.board)
             return True
         return False
 
@@ -31,80 +154,125 @@ class PokerEngine:
         label: e.g. 'Ah'
         """
         try:
-            card_obj = Card.new(label)
+            card = LABEL_TO_INDEX[label]
+            cards = list(self.state.hero if card_type == 'hero' else self.state.board)
+            while len(cards) <= index:
+                cards.append(None)
+            cards[index] = card
+            # Filter out any Nones if multiple manual sets happened
+            cards = [c for c in cards if c is not None]
             if card_type == 'hero':
-                while len(self.hero_hand) <= index:
-                    self.hero_hand.append(None)
-                self.hero_hand[index] = card_obj
-                # Filter out any Nones if multiple manual sets happened
-                self.hero_hand = [c for c in self.hero_hand if c is not None][:2]
+                self.state = self.state.with_hero(cards[:2])
             else:
-                while len(self.community_cards) <= index:
-                    self.community_cards.append(None)
-                self.community_cards[index] = card_obj
-                self.community_cards = [c for c in self.community_cards if c is not None][:5]
+                self.state = self.state.with_board(cards[:5])
             return True
         except:
             return False
 
     def reset_hand(self):
-        self.hero_hand = []
-        self.community_cards = []
+        self.state = HandState()
         self.hero_hand_locked = False
         self.community_locked_count = 0
 
     def update_state(self, detected_cards):
         if not detected_cards and not self.hero_hand_locked:
-            self.hero_hand = []
-            self.community_cards = []
+            self.state = HandState()
             return
         
         # Sort by x coordinate for community cards (left to right)
         sorted_x = sorted(detected_cards, key=lambda x: x['bbox'][0])
         # Sort by y coordinate for hero (closer to bottom)
         sorted_y = sorted(detected_cards, key=lambda x: x['bbox'][3], reverse=True)
-        
-        hero_strs = [Card.int_to_str(c) for c in self.hero_hand if c]
-        community_strs = [Card.int_to_str(c) for c in self.community_cards if c]
 
         # 1. Handle Hero Hand
         if not self.hero_hand_locked:
             if len(sorted_y) >= 2:
                 try:
-                    self.hero_hand = [Card.new(c['label']) for c in sorted_y[:2]]
-                except: pass
+                    self.state = self.state.with_hero([LABEL_TO_INDEX[c['label']] for c in sorted_y[:2]])
+                except KeyError: pass
         
         # 2. Handle Community Cards
         if self.hero_hand_locked:
-            # Filter out detections that are already in our hero hand
-            candidates = [c['label'] for c in sorted_x if c['label'] not in hero_strs]
+            state = self.state
+            # Filter out detections that are already in our hero hand.
+            # Unknown labels are kept as None so they still block an update.
+            candidates = [LABEL_TO_INDEX.get(c['label']) for c in sorted_x]
+            candidates = [c for c in candidates if c is None or not state.hero_mask >> c & 1]
             
             if self.community_locked_count == 0:
                 # Looking for Flop (3 cards)
-                if len(candidates) >= 3:
-                    try:
-                        self.community_cards = [Card.new(c) for c in candidates[:3]]
-                    except: pass
+                if len(candidates) >= 3 and None not in candidates[:3]:
+                    self.state = state.with_board(candidates[:3])
             
-            elif self.community_locked_count == 3:
-                # Flop is locked. Looking for 1 more (Turn)
-                # Keep first 3 from locked, add 1 new one that isn't already in community
-                new_candidates = [c for c in candidates if c not in community_strs[:3]]
-                if len(new_candidates) >= 1:
-                    try:
-                        self.community_cards = [Card.new(c) for c in (community_strs[:3] + [new_candidates[0]])]
-                    except: pass
-                    
-            elif self.community_locked_count == 4:
-                # Turn is locked. Looking for 1 more (River)
-                new_candidates = [c for c in candidates if c not in community_strs[:4]]
-                if len(new_candidates) >= 1:
-                    try:
-                        self.community_cards = [Card.new(c) for c in (community_strs[:4] + [new_candidates[0]])]
-                    except: pass
-
-    def calculate_odds(self):
-        if len(self.hero_hand) != 2:
+            elif self.community_locked_count in (3, 4):
+                # Flop (or turn) is locked. Keep the locked cards and add 1 new
+                # one that isn't already among them
+                locked = state.board[:self.community_locked_count]
+                locked_mask = cards_to_mask(locked)
+                new_candidates = [c for c in candidates if c is None or not locked_mask >> c & 1]
+                if len(new_candidates) >= 1 and new_candidates[0] is not None:
+                    self.state = state.with_board(locked + (new_candidates[0],))
+
+    @property
+    def state_version(self):
+        """Increments whenever the hero hand, board or player count changes"""
+        key = (self.state.key, self.num_players, self._ranges_version)
+        if key != self._state_key:
+            self._state_key = key
+            self._state_version += 1
+        return self._state_version
+
+    def set_opponent_range(self, seat, opponent_range):
+        """
+        Sets the hand range of one opponent.
+        seat: opponent index, 0 for the first opponent
+        opponent_range: notation like "QQ+, AKs, 76s" (see ranges.py), a Range,
+                        or None for a random hand
+        Raises ValueError on bad notation.
+        """
+        if not 0 <= seat < 8:
+            raise ValueError(f"Invalid seat: {seat}")
+        if isinstance(opponent_range, str):
+            opponent_range = parse_range(opponent_range)
+        if opponent_range is None:
+            self.opponent_ranges.pop(seat, None)
+        elif isinstance(opponent_range, Range):
+            self.opponent_ranges[seat] = opponent_range
+        else:
+            raise ValueError(f"Invalid range: {opponent_range!r}")
+        self._ranges_version += 1
+
+    def calculate_odds(self, time_budget=None, target_se=None):
+        """
+        Returns the hero's win and tie rates (percent) for the current state.
+
+        time_budget: seconds to keep sampling (defaults to self.time_budget)
+        target_se: stop once the standard error of win_rate, in percentage
+                   points, is at most this (defaults to self.target_se)
+
+        Monte Carlo keeps sampling in chunks until either budget is met, or
+        runs one batch of BACKEND_ITERATIONS when neither is set. Results
+        carry the iteration count, the standard error and a 95% confidence
+        interval (ci_low, ci_high).
+
+        Calls from several threads on one engine run one at a time.
+        """
+        with self._odds_lock:
+            return self._calculate_odds(time_budget, target_se)
+
+    def _calculate_odds(self, time_budget, target_se):
+        if time_budget is None:
+            time_budget = self.time_budget
+        if target_se is None:
+            target_se = self.target_se
+
+        # Snapshot the state first: this may run in a worker thread while
+        # control messages keep changing the engine
+        hand = self.state
+        num_players = self.num_players
+
+        if len(hand.hero) != 2:
+            ODDS_REQUESTS.inc(1, 'waiting')
             return {
                 "win_rate": 0.0,
                 "tie_rate": 0.0,
@@ -113,15 +281,74 @@ class PokerEngine:
 
         # Determine stage
         stage = "Pre-Flop"
-        if len(self.community_cards) == 3:
+        if len(hand.board) == 3:
             stage = "Flop"
-        elif len(self.community_cards) == 4:
+        elif len(hand.board) == 4:
             stage = "Turn"
-        elif len(self.community_cards) == 5:
+        elif len(hand.board) == 5:
             stage = "River"
-            
-        iterations = 1000 
-        return self._run_monte_carlo(iterations, stage)
+
+        hero = list(hand.hero)
+        board = list(hand.board)
+        # Ranges are only sampled: the preflop table, cache and exact
+        # enumeration all assume random opponent hands
+        opponent_ranges = self._active_ranges(num_players)
+
+        # Preflop equity only depends on the canonical hand and player count
+        if not board and self.preflop_table is not None and opponent_ranges is None:
+            win_rate, tie_rate = preflop.lookup(self.preflop_table, hero, num_players)
+            std_error = sampling_error(win_rate / 100 * preflop.TABLE_ITERATIONS, preflop.TABLE_ITERATIONS)
+            ci_low, ci_high = confidence_interval(win_rate, std_error)
+            ODDS_REQUESTS.inc(1, 'preflop')
+            return {
+                "win_rate": win_rate,
+                "tie_rate": tie_rate,
+                "stage": stage,
+                "num_players": num_players,
+                "precomputed": True,
+                "iterations": preflop.TABLE_ITERATIONS,
+                "std_error": std_error,
+                "ci_low": ci_low,
+                "ci_high": ci_high
+            }
+
+        # Nothing changed since the last call: keep refining that estimate.
+        # Solver settings are part of the state so changing them starts over.
+        state = (hand.key, num_players, self._ranges_version,
+                 self.backend, self.exact_limit, self.sampler)
+        estimate = self._estimate
+        if estimate is not None and estimate['state'] == state:
+            if self._is_final(estimate['result'], target_se):
+                ODDS_REQUESTS.inc(1, 'unchanged')
+                return dict(estimate['result'])
+            ODDS_REQUESTS.inc(1, 'refine')
+            return self._refine(estimate, hero, board, num_players, time_budget, target_se, opponent_ranges)
+
+        # Repeated frames and suit-isomorphic spots share one cache entry.
+        # A shared cache may serve engines with other solver settings.
+        key = None
+        if self.cache is not None and opponent_ranges is None:
+            key = canonicalize(hero, board, num_players) + (self.backend, self.exact_limit, self.sampler)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._estimate = {'state': state, 'key': key, 'result': cached}
+                ODDS_REQUESTS.inc(1, 'cache')
+                return dict(cached)
+
+        # Small spots (heads-up turn/river) are cheaper to solve exactly than to sample
+        combinations = exact.count_combinations(len(board), num_players - 1)
+        if combinations <= self.exact_limit and opponent_ranges is None:
+            ODDS_REQUESTS.inc(1, 'exact')
+            result = self._run_exact(hero, board, num_players, stage)
+        elif self.sampler != 'random' and opponent_ranges is None:
+            ODDS_REQUESTS.inc(1, 'monte_carlo')
+            result = self._sample_replicates(hero, board, num_players, stage, (0.0, 0.0, 0.0, 0), time_budget, target_se)
+        else:
+            ODDS_REQUESTS.inc(1, 'monte_carlo')
+            result = self._sample(hero, board, num_players, stage, 0, 0, 0, time_budget, target_se, opponent_ranges)
+
+        self._store_estimate(state, key, result)
+        return dict(result)
 
     def set_num_players(self, num):
         # Allow setting number of players dynamically
@@ -131,37 +358,232 @@ class PokerEngine:
             num = 9
         self.num_players = num
 
-    def _run_monte_carlo(self, iterations, stage):
+    def _active_ranges(self, num_players):
+        """Range (or None) per opponent in play, or None when every opponent is random"""
+        selected = [self.opponent_ranges.get(seat) for seat in range(num_players - 1)]
+        if all(r is None for r in selected):
+            return None
+        return selected
+
+    def is_converged(self, result):
+        """True when calculate_odds would return `result` unchanged for the same state"""
+        if "iterations" not in result:
+            return True
+        return self._is_final(result, self.target_se)
+
+    def _is_final(self, result, target_se=None):
+        if result.get("exact", False) or result.get("precomputed", False):
+            return True
+        if result.get("iterations", 0) >= self.max_iterations:
+            return True
+        return target_se is not None and result.get("std_error", 100.0) <= target_se
+
+    def _store_estimate(self, state, key, result):
+        self._estimate = {'state': state, 'key': key, 'result': result}
+        if key is not None:
+            self.cache.put(key, dict(result))
+
+    def _refine(self, estimate, hero, board, num_players, time_budget=None, target_se=None, opponent_ranges=None):
+        """Adds more iterations to the running win/tie counts of the last estimate"""
+        previous = estimate['result']
+        if "replicates" in previous:
+            # Recover the replicate sums from the rates and their error
+            n = previous["replicates"]
+            mean = previous["win_rate"] / 100
+            variance = (previous["std_error"] / 100) ** 2 * n
+            tally = (mean * n, variance * (n - 1) + n * mean * mean, previous["tie_rate"] / 100 * n, n)
+            result = self._sample_replicates(hero, board, num_players, previous["stage"], tally, time_budget, target_se)
+            self._store_estimate(estimate['state'], estimate['key'], result)
+            return dict(result)
+
+        done = previous.get("iterations", 0)
+        # Weighted range simulations give fractional counts, so they aren't rounded
+        wins = previous["win_rate"] * done / 100
+        ties = previous["tie_rate"] * done / 100
+        effective = previous.get("effective_iterations", done)
+
+        result = self._sample(hero, board, num_players, previous["stage"], wins, ties, done,
+                              time_budget, target_se, opponent_ranges, effective)
+        self._store_estimate(estimate['state'], estimate['key'], result)
+        return dict(result)
+
+    def _sample(self, hero, board, num_players, stage, wins, ties, done, time_budget, target_se, opponent_ranges=None,
+                effective=None):
+        """
+        Samples on top of the given counts in chunks until a budget is met,
+        or one batch of BACKEND_ITERATIONS when no budget is set.
+        effective: effective sample size of the given counts (default: done)
+        """
+        if effective is None:
+            effective = done
+        start = time.perf_counter()
+        budgeted = time_budget is not None or target_se is not None
+        if budgeted:
+            goal = self.max_iterations
+            chunk_size = CHUNK_ITERATIONS[self.backend]
+            if self.backend == 'numpy' and self.pool is not None:
+                # Give every worker a full chunk per round
+                chunk_size = max(chunk_size, self.pool.chunk_size * self.pool.workers)
+        else:
+            goal = min(done + BACKEND_ITERATIONS[self.backend], self.max_iterations)
+            chunk_size = goal - done
+
+        while done < goal:
+            iterations = min(chunk_size, goal - done)
+            simulated = self._simulate(hero, board, num_players, iterations, opponent_ranges)
+            wins += simulated[0]
+            ties += simulated[1]
+            # Range simulations are weighted: they count for their effective sample size
+            effective += simulated[2] if len(simulated) > 2 else iterations
+            done += iterations
+            SIMULATION_ITERATIONS.inc(iterations)
+            if time_budget is not None and time.perf_counter() - start >= time_budget:
+                break
+            if target_se is not None and sampling_error(wins, done, effective) <= target_se:
+                break
+
+        return self._result(wins, ties, done, stage, num_players, effective)
+
+    def _sample_replicates(self, hero, board, num_players, stage, tally, time_budget, target_se):
+        """
+        _sample for the variance-reduced samplers: adds whole replicates to
+        `tally` = (sum of win rates, sum of squared win rates, sum of tie
+        rates, replicates) under the same budgets
+        """
+        start = time.perf_counter()
+        size = samplers.replicate_size(self.sampler, hero, board, num_players - 1)
+        win_sum, win_sq_sum, tie_sum, replicates = tally
+        done = replicates * size
+        if time_budget is not None or target_se is not None:
+            goal = self.max_iterations
+            chunk_size = CHUNK_ITERATIONS['numpy']
+        else:
+            goal = min(done + BACKEND_ITERATIONS['numpy'], self.max_iterations)
+            chunk_size = goal - done
+
+        while done < goal:
+            count = max(1, min(chunk_size, goal - done) // size)
+            win, tie = samplers.sample(self.sampler, hero, board, num_players - 1, count, self.rng,
+                                       self._deck(hero, board))
+            if len(win) == 0:
+                break
+            win_sum += float(win.sum())
+            win_sq_sum += float(np.dot(win, win))
+            tie_sum += float(tie.sum())
+            replicates += count
+            done += count * size
+            SIMULATION_ITERATIONS.inc(count * size)
+            if time_budget is not None and time.perf_counter() - start >= time_budget:
+                break
+            if (target_se is not None and replicates >= MIN_REPLICATES
+                    and replicate_error(win_sum, win_sq_sum, replicates) <= target_se):
+                break
+
+        if replicates == 0:
+            return {"win_rate": 0, "tie_rate": 0, "stage": stage}
+        win_rate = win_sum / replicates * 100
+        std_error = replicate_error(win_sum, win_sq_sum, replicates)
+        ci_low, ci_high = confidence_interval(win_rate, std_error)
+        p = win_sum / replicates
+        return {
+            "win_rate": win_rate,
+            "tie_rate": tie_sum / replicates * 100,
+            "stage": stage,
+            "num_players": num_players,
+            "iterations": done,
+            "std_error": std_error,
+            "ci_low": ci_low,
+            "ci_high": ci_high,
+            "sampler": self.sampler,
+            "replicates": replicates,
+            # Plain Monte Carlo iterations that would give the same error
+            "effective_iterations": int(p * (1 - p) / (std_error / 100) ** 2) if 0 < std_error < 100 else done
+        }
+
+    def _result(self, wins, ties, iterations, stage, num_players, effective=None):
+        if iterations == 0:
+            return {"win_rate": 0, "tie_rate": 0, "stage": stage}
+
+        win_rate = (wins / iterations) * 100
+        std_error = sampling_error(wins, iterations, effective)
+        ci_low, ci_high = confidence_interval(win_rate, std_error)
+        result = {
+            "win_rate": win_rate,
+            "tie_rate": (ties / iterations) * 100,
+            "stage": stage,
+            "num_players": num_players,
+            "iterations": iterations,
+            "std_error": std_error,
+            "ci_low": ci_low,
+            "ci_high": ci_high
+        }
+        if effective is not None and effective != iterations:
+            result["effective_iterations"] = effective
+        return result
+
+    def _run_exact(self, hero, board, num_players, stage):
+        wins, ties, total = exact.enumerate_equity(hero, board, num_players - 1, self._deck(hero, board))
+
+        if total == 0:
+            return {"win_rate": 0, "tie_rate": 0, "stage": stage}
+
+        win_rate = (wins / total) * 100
+        return {
+            "win_rate": win_rate,
+            "tie_rate": (ties / total) * 100,
+            "stage": stage,
+            "num_players": num_players,
+            "exact": True,
+            "std_error": 0.0,
+            "ci_low": win_rate,
+            "ci_high": win_rate
+        }
+
+    def _simulate(self, hero, board, num_players, iterations, opponent_ranges=None):
+        """
+        Runs the configured Monte Carlo backend, returns (wins, ties).
+        Ranges always go through the vectorized range sampler, which also
+        returns its effective sample size.
+        """
+        if self.backend == 'python' and opponent_ranges is None:
+            return self._run_monte_carlo(hero, board, num_players, iterations)
+        if self.pool is not None:
+            seed = int(self.rng.integers(2 ** 63))
+            deck = self._deck(hero, board) if opponent_ranges is None else None
+            return self.pool.simulate(hero, board, num_players - 1, iterations, seed, opponent_ranges, deck)
+        if opponent_ranges is not None:
+            return vector_sim.simulate_ranges(hero, board, opponent_ranges, iterations, self.rng)
+        return vector_sim.simulate(hero, board, num_players - 1, iterations, self.rng, self._deck(hero, board))
+
+    def _deck(self, hero, board):
+        """
+        Remaining deck for hero + board. The current state's deck is cached
+        (and derived from the previous street's); only a stale snapshot
+        rebuilds it.
+        """
+        hand = self.state
+        if hand.dead_mask != cards_to_mask(list(hero) + list(board)):
+            hand = HandState(hero, board)
+        return hand.deck()
+
+    def _run_monte_carlo(self, hero, community, num_players, iterations):
         wins = 0
         ties = 0
         
-        # Prepare valid deck
-        full_deck = Deck()
-        known_cards = self.hero_hand + self.community_cards
-        
-        # Filter only valid cards from deck and exclude known
-        available_cards = []
-        for c in full_deck.cards:
-            if c in known_cards:
-                continue
-            prime = c & 0xFF
-            if prime < 2:
-                continue
-            available_cards.append(c)
+        available_cards = self._deck(hero, community).tolist()
         
         import random
-        num_opponents = self.num_players - 1
+        num_opponents = num_players - 1
+        
+        # Check if enough cards for opponents + board fill
+        cards_needed_opp = num_opponents * 2
+        board_needed = 5 - len(community)
+        if len(available_cards) < cards_needed_opp + board_needed:
+            return wins, ties
         
         for _ in range(iterations):
             try:
                 random.shuffle(available_cards)
-                
-                # Check if enough cards for opponents + board fill
-                cards_needed_opp = num_opponents * 2
-                board_needed = 5 - len(self.community_cards)
-                
-                if len(available_cards) < cards_needed_opp + board_needed:
-                    continue
 
                 # Deal to opponents
                 opp_hands = []
@@ -173,13 +595,13 @@ class PokerEngine:
                 
                 # Deal board fill
                 board_fill = available_cards[current_idx : current_idx+board_needed]
-                sim_board = self.community_cards + board_fill
+                sim_board = community + board_fill
                 
                 # Evaluate Hero
-                hero_score = self.evaluator.evaluate(sim_board, self.hero_hand)
+                hero_score = self.evaluator.evaluate(sim_board + hero)
                 
                 # Evaluate Opponents
-                opp_scores = [self.evaluator.evaluate(sim_board, h) for h in opp_hands]
+                opp_scores = [self.evaluator.evaluate(sim_board + h) for h in opp_hands]
                 
                 # Compare
                 best_opp_score = min(opp_scores)
@@ -192,15 +614,4 @@ class PokerEngine:
             except Exception as e:
                 continue
                 
-        if iterations == 0:
-            return {"win_rate": 0, "tie_rate": 0, "stage": stage}
-            
-        win_rate = (wins / iterations) * 100
-        tie_rate = (ties / iterations) * 100
-        
-        return {
-            "win_rate": win_rate,
-            "tie_rate": tie_rate,
-            "stage": stage,
-            "num_players": self.num_players
-        }
+        return wins, ties
@@ -0,0 +1,128 @@
+"""
+Precomputed preflop equity for the 169 canonical starting hands.
+
+Preflop equity only depends on the canonical hand (pair / suited / offsuit)
+and the number of players, so it is simulated once offline and looked up
+at runtime. Build the table with:
+
+    python preflop.py --iterations 200000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+import vector_sim
+from cards import RANKS
+
+NUM_HANDS = 169
+MIN_PLAYERS = 2
+MAX_PLAYERS = 9
+# Simulations per entry in the shipped table, used to report its precision
+TABLE_ITERATIONS = 200000
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_equity.npy')
+
+
+def hand_index(card1, card2):
+    """
+    Canonical index (0..168) of a starting hand given as two card indices.
+    Laid out as a 13x13 grid: pairs on the diagonal, suited hands at
+    [high][low] and offsuit hands at [low][high].
+    """
+    rank1, rank2 = card1 // 4, card2 // 4
+    high, low = max(rank1, rank2), min(rank1, rank2)
+    if card1 % 4 == card2 % 4:
+        return high * 13 + low
+    return low * 13 + high
+
+
+def hand_name(index):
+    """Human readable name of a canonical hand, e.g. 'AKs', 'T9o', '77'"""
+    row, col = divmod(index, 13)
+    if row == col:
+        return RANKS[row] * 2
+    if row > col:
+        return RANKS[row] + RANKS[col] + 's'
+    return RANKS[col] + RANKS[row] + 'o'
+
+
+def representative_hand(index):
+    """Two card indices that belong to the canonical hand"""
+    row, col = divmod(index, 13)
+    if row > col:
+        # Suited: both spades
+        return [row * 4, col * 4]
+    # Pairs and offsuit: spade + heart
+    return [row * 4, col * 4 + 1]
+
+
+def build_table(iterations, seed=0, verbose=True):
+    """
+    Simulates every canonical hand against 1..8 random opponents.
+    Returns a float32 array of shape (169, 8, 2) with (win %, tie %).
+    """
+    rng = np.random.default_rng(seed)
+    table = np.zeros((NUM_HANDS, MAX_PLAYERS - MIN_PLAYERS + 1, 2), dtype=np.float32)
+    start = time.time()
+
+    for index in range(NUM_HANDS):
+        hero = representative_hand(index)
+        for num_players in range(MIN_PLAYERS, MAX_PLAYERS + 1):
+            wins = ties = done = 0
+            # Simulate in chunks to keep memory flat
+            while done < iterations:
+                chunk = min(50000, iterations - done)
+                w, t = vector_sim.simulate(hero, [], num_players - 1, chunk, rng)
+                wins += w
+                ties += t
+                done += chunk
+            table[index, num_players - MIN_PLAYERS] = (wins / iterations * 100, ties / iterations * 100)
+
+        if verbose:
+            print(f"[{index + 1}/{NUM_HANDS}] {hand_name(index)}: "
+                  f"{table[index, 0, 0]:.2f}% heads-up ({time.time() - start:.0f}s)")
+
+    return table
+
+
+def save_table(table, path=DEFAULT_TABLE_PATH):
+    np.save(path, table)
+
+
+def load_table(path=DEFAULT_TABLE_PATH):
+    """Loads the precomputed table, or returns None if it has not been built"""
+    if not os.path.exists(path):
+        return None
+    try:
+        # Memory-mapped: every engine shares the same pages instead of a copy
+        table = np.load(path, mmap_mode='r')
+    except Exception as e:
+        print(f"Error loading preflop table: {e}")
+        return None
+    if table.shape != (NUM_HANDS, MAX_PLAYERS - MIN_PLAYERS + 1, 2):
+        print(f"Ignoring preflop table with unexpected shape {table.shape}")
+        return None
+    return table
+
+
+def lookup(table, hero, num_players):
+    """Returns (win %, tie %) for a hero hand (card indices) and player count"""
+    win_rate, tie_rate = table[hand_index(hero[0], hero[1]), num_players - MIN_PLAYERS]
+    return float(win_rate), float(tie_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the preflop equity table")
+    parser.add_argument('--iterations', type=int, default=TABLE_ITERATIONS, help="simulations per hand and player count")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_TABLE_PATH)
+    args = parser.parse_args()
+
+    table = build_table(args.iterations, args.seed)
+    save_table(table, args.output)
+    print(f"Saved preflop table to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
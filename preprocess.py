@@ -0,0 +1,147 @@
+from collections import deque
+
+import cv2
+
+from metrics import INFERENCE_PIXELS
+
+
+class FramePreprocessor:
+    """
+    Shrinks what the detector has to look at.
+
+    Frames are downscaled so their longest side is at most `input_size`
+    (the model's input resolution). With `roi` enabled, boxes from the last
+    `history` keyframes define where cards are: hero cards and board cards
+    usually form two horizontal bands, so only those are cropped (plus
+    `margin` of a card size), at the same scale as a full-frame pass, and
+    their detections are mapped back to frame coordinates.
+
+    A full-frame pass runs every `full_frame_interval` keyframes, when there
+    is no history yet, when the last cropped pass found fewer cards than the
+    last full pass, when the caller forces one (a scene change: newly dealt
+    cards can be outside the regions) or when the regions cover most of the
+    frame anyway.
+    """
+
+    def __init__(self, input_size=640, roi=True, full_frame_interval=10, history=3, margin=0.5,
+                 max_roi_fraction=0.6):
+        self.input_size = input_size
+        self.roi = roi
+        self.full_frame_interval = full_frame_interval
+        self.margin = margin
+        self.max_roi_fraction = max_roi_fraction
+        self._boxes = deque(maxlen=history)
+        self._since_full = 0
+        self._expected_cards = 0
+        self._force_full = True
+        self._full = True
+        self.full_passes = 0
+        self.roi_passes = 0
+
+    def reset(self):
+        self._boxes.clear()
+        self._since_full = 0
+        self._expected_cards = 0
+        self._force_full = True
+
+    def prepare(self, frame, force_full=False):
+        """
+        Returns a list of (image, transform) to run through the detector.
+        transform = (x0, y0, scale) maps image coordinates back to the frame.
+        force_full: look at the whole frame (see CardTracker.scene_change)
+        """
+        h, w = frame.shape[:2]
+        regions = None
+        if self.roi and not force_full and not self._force_full and self._since_full + 1 < self.full_frame_interval:
+            regions = self._regions(w, h)
+            if regions is not None:
+                area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+                if area > self.max_roi_fraction * w * h:
+                    regions = None
+
+        if regions is None:
+            self._full = True
+            regions = [(0, 0, w, h)]
+        else:
+            self._full = False
+
+        # Crops keep the full-frame scale: same detail, a fraction of the pixels
+        scale = min(1.0, self.input_size / max(w, h))
+        prepared = []
+        for x1, y1, x2, y2 in regions:
+            crop = frame[y1:y2, x1:x2]
+            if scale < 1.0:
+                crop = cv2.resize(crop, (max(1, round((x2 - x1) * scale)), max(1, round((y2 - y1) * scale))),
+                                  interpolation=cv2.INTER_AREA)
+            prepared.append((crop, (x1, y1, scale)))
+            INFERENCE_PIXELS.inc(crop.shape[0] * crop.shape[1], 'model')
+        INFERENCE_PIXELS.inc(w * h, 'frame')
+        return prepared
+
+    def merge(self, prepared, results):
+        """Maps per-region detections back to the frame and updates the learned regions"""
+        best = {}
+        for (_, (x0, y0, scale)), detections in zip(prepared, results):
+            for det in detections:
+                x1, y1, x2, y2 = det['bbox']
+                bbox = (int(x1 / scale) + x0, int(y1 / scale) + y0, int(x2 / scale) + x0, int(y2 / scale) + y0)
+                if det['label'] not in best or det['conf'] > best[det['label']]['conf']:
+                    best[det['label']] = dict(det, bbox=bbox)
+        detections = list(best.values())
+
+        if self._full:
+            self.full_passes += 1
+            self._since_full = 0
+            self._expected_cards = len(detections)
+            self._force_full = False
+        else:
+            self.roi_passes += 1
+            self._since_full += 1
+            # Lost a card (moved out of the crop, camera shifted): look at everything next time
+            self._force_full = len(detections) < self._expected_cards
+            self._expected_cards = max(self._expected_cards, len(detections))
+        if detections:
+            self._boxes.append([d['bbox'] for d in detections])
+        return detections
+
+    def detect(self, frame, detect_batch, force_full=False):
+        """Synchronous convenience: runs `detect_batch` (CardDetector.detect_batch) on the prepared regions"""
+        prepared = self.prepare(frame, force_full)
+        return self.merge(prepared, detect_batch([image for image, _ in prepared]))
+
+    def _regions(self, w, h):
+        """One or two crop rectangles around recent card boxes, or None without history"""
+        boxes = [box for keyframe in self._boxes for box in keyframe]
+        if not boxes:
+            return None
+
+        # Split into vertical bands (hero row, board row) at the widest gap
+        boxes.sort(key=lambda b: b[1])
+        groups = [[boxes[0]]]
+        bottom = boxes[0][3]
+        for box in boxes[1:]:
+            if box[1] > bottom:
+                groups.append([box])
+            else:
+                groups[-1].append(box)
+            bottom = max(bottom, box[3])
+        if len(groups) > 2:
+            gaps = [groups[i + 1][0][1] - max(b[3] for b in groups[i]) for i in range(len(groups) - 1)]
+            split = gaps.index(max(gaps)) + 1
+            groups = [sum(groups[:split], []), sum(groups[split:], [])]
+
+        regions = []
+        for group in groups:
+            x1, y1 = min(b[0] for b in group), min(b[1] for b in group)
+            x2, y2 = max(b[2] for b in group), max(b[3] for b in group)
+            # Margin in units of a card so cards sliding a bit stay in view
+            pad_x = int(sum(b[2] - b[0] for b in group) / len(group) * self.margin) + 1
+            pad_y = int(sum(b[3] - b[1] for b in group) / len(group) * self.margin) + 1
+            regions.append((max(0, x1 - pad_x), max(0, y1 - pad_y), min(w, x2 + pad_x), min(h, y2 + pad_y)))
+        return regions
+
+    def stats(self):
+        return {
+            "full_passes": self.full_passes,
+            "roi_passes": self.roi_passes
+        }
@@ -0,0 +1,40 @@
+import struct
+
+# Binary websocket frame message:
+#   session number (uint32) | sequence number (uint32) | num_players (uint8) | JPEG bytes
+# Integers are big-endian. Everything else (lock, reset, set_manual, ...) stays JSON text.
+FRAME_HEADER = struct.Struct('!IIB')
+
+# The payload is the only thing after the header: it must at least look like
+# a JPEG (start-of-image marker, and room for the end-of-image marker)
+JPEG_SOI = b'\xff\xd8'
+MIN_PAYLOAD_SIZE = 4
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def pack_frame(session, sequence, num_players, jpeg_bytes):
+    return FRAME_HEADER.pack(session, sequence, num_players) + bytes(jpeg_bytes)
+
+
+def unpack_frame(buffer):
+    """
+    Splits a binary frame message into its header fields and the JPEG payload.
+    The payload is a memoryview into `buffer`, so no bytes are copied.
+    """
+    if len(buffer) < FRAME_HEADER.size:
+        raise ProtocolError(f"Truncated frame header ({len(buffer)} of {FRAME_HEADER.size} bytes)")
+    payload = memoryview(buffer)[FRAME_HEADER.size:]
+    if len(payload) < MIN_PAYLOAD_SIZE:
+        raise ProtocolError(f"Frame payload too short ({len(payload)} bytes)")
+    if payload[:len(JPEG_SOI)] != JPEG_SOI:
+        raise ProtocolError("Unknown frame payload type (not a JPEG)")
+    session, sequence, num_players = FRAME_HEADER.unpack_from(buffer)
+    return {
+        "session": session,
+        "seq": sequence,
+        "num_players": num_players,
+        "jpeg": payload
+    }
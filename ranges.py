@@ -0,0 +1,145 @@
+"""
+Opponent hand ranges.
+
+A range is a weighted set of two-card combos, written in the usual notation:
+
+    "QQ+, AKs, 76s"         pairs QQ..AA, suited AK and suited 76
+    "A2s+, KQo, 22-55"      suited A2..AK, offsuit KQ, pairs 22..55
+    "AKo:0.5, AhKh"         half weight on offsuit AK, one explicit combo
+    "random"                every hand
+
+A bare "AK" means suited and offsuit. Tokens are separated by commas; a
+`:weight` suffix sets the weight of every combo in the token (default 1).
+When tokens overlap, the later one wins.
+"""
+import math
+import re
+from itertools import combinations
+
+import numpy as np
+
+from cards import NUM_CARDS, RANKS, SUITS, str_to_index
+
+_RANK = '[2-9TJQKA]'
+_HAND = re.compile(rf'^({_RANK})({_RANK})([so]?)(\+?)$', re.IGNORECASE)
+_SPAN = re.compile(rf'^({_RANK})({_RANK})([so]?)-({_RANK})({_RANK})([so]?)$', re.IGNORECASE)
+_COMBO = re.compile(rf'^({_RANK}[shdc])({_RANK}[shdc])$', re.IGNORECASE)
+
+
+def _rank(char):
+    return RANKS.index(char.upper())
+
+
+def _pair_combos(rank):
+    return list(combinations([rank * 4 + s for s in range(4)], 2))
+
+
+def _hand_combos(high, low, kind):
+    """Combos of a non-pair hand; kind is 's', 'o' or '' for both"""
+    combos = []
+    for s1 in range(4):
+        for s2 in range(4):
+            if (kind == 's' and s1 != s2) or (kind == 'o' and s1 == s2):
+                continue
+            combos.append((high * 4 + s1, low * 4 + s2))
+    return combos
+
+
+def _token_combos(token):
+    """Expands one token (without weight) into a list of card index pairs"""
+    if token.lower() in ('random', 'any', '*'):
+        return list(combinations(range(NUM_CARDS), 2))
+
+    match = _COMBO.match(token)
+    if match:
+        first = match.group(1)[0].upper() + match.group(1)[1].lower()
+        second = match.group(2)[0].upper() + match.group(2)[1].lower()
+        if first == second:
+            raise ValueError(f"Invalid range token: {token}")
+        return [(str_to_index(first), str_to_index(second))]
+
+    match = _HAND.match(token)
+    if match:
+        high, low = _rank(match.group(1)), _rank(match.group(2))
+        kind, plus = match.group(3).lower(), match.group(4)
+        if high == low:
+            if kind:
+                raise ValueError(f"Invalid range token: {token}")
+            top = RANKS.index('A') if plus else high
+            return [c for rank in range(high, top + 1) for c in _pair_combos(rank)]
+        high, low = max(high, low), min(high, low)
+        # "A2s+" raises the kicker up to one below the top card
+        top = high - 1 if plus else low
+        return [c for kicker in range(low, top + 1) for c in _hand_combos(high, kicker, kind)]
+
+    match = _SPAN.match(token)
+    if match and match.group(3).lower() == match.group(6).lower():
+        kind = match.group(3).lower()
+        high1, low1 = _rank(match.group(1)), _rank(match.group(2))
+        high2, low2 = _rank(match.group(4)), _rank(match.group(5))
+        if high1 == low1 and high2 == low2 and not kind:
+            # "22-55"
+            return [c for rank in range(min(high1, high2), max(high1, high2) + 1) for c in _pair_combos(rank)]
+        if high1 == high2 and low1 < high1 and low2 < high1:
+            # "A2s-A5s"
+            return [c for kicker in range(min(low1, low2), max(low1, low2) + 1) for c in _hand_combos(high1, kicker, kind)]
+
+    raise ValueError(f"Invalid range token: {token}")
+
+
+class Range:
+    """
+    Weighted two-card combos as arrays, ready for vectorized sampling:
+    `combos` has shape (n, 2) (card indices, see cards.py), `weights` shape (n,).
+    """
+
+    def __init__(self, combos, weights=None):
+        self.combos = np.asarray(combos, dtype=np.int64).reshape(-1, 2)
+        if weights is None:
+            weights = np.ones(len(self.combos))
+        self.weights = np.asarray(weights, dtype=np.float64)
+        if self.weights.shape != (len(self.combos),):
+            raise ValueError("Range needs one weight per combo")
+        if not (np.isfinite(self.weights).all() and (self.weights >= 0).all()):
+            raise ValueError("Range weights must be finite and non-negative")
+
+    def __len__(self):
+        return len(self.combos)
+
+    def without(self, dead):
+        """Combos and weights that don't use any of the `dead` card indices"""
+        blocked = np.zeros(NUM_CARDS, dtype=bool)
+        blocked[list(dead)] = True
+        keep = ~blocked[self.combos].any(axis=1) & (self.weights > 0)
+        return self.combos[keep], self.weights[keep]
+
+    def describe(self):
+        """Readable combo list, mostly for debugging"""
+        return [
+            f"{RANKS[a // 4]}{SUITS[a % 4]}{RANKS[b // 4]}{SUITS[b % 4]}:{w:g}"
+            for (a, b), w in zip(self.combos, self.weights)
+        ]
+
+
+def parse_range(text):
+    """Parses range notation (see module docstring) into a Range. Raises ValueError."""
+    weights = {}
+    for token in text.replace(' ', '').split(','):
+        if not token:
+            continue
+        weight = 1.0
+        if ':' in token:
+            token, _, value = token.partition(':')
+            try:
+                weight = float(value)
+            except ValueError:
+                raise ValueError(f"Invalid range weight: {value}")
+            if not (math.isfinite(weight) and weight >= 0):
+                raise ValueError(f"Invalid range weight: {value}")
+        for a, b in _token_combos(token):
+            weights[(max(a, b), min(a, b))] = weight
+
+    if not weights:
+        raise ValueError(f"Empty range: {text!r}")
+    return Range(list(weights), list(weights.values()))
+
@@ -0,0 +1,162 @@
+"""
+Variance-reduced Monte Carlo samplers for PokerEngine (sampler=...).
+
+Every sampler produces independent *replicates*: small groups of deals
+whose average is an unbiased estimate of the equity. The estimate is the
+mean over replicates and its standard error comes from their spread, so
+each sampler reports an honest error however the deals inside a
+replicate are correlated.
+
+    stratified  one deal for every possible board runout (or, when there
+                are too many runouts, every possible next card), with
+                the opponents' cards random. Every runout is equally
+                likely, so the replicate mean is unbiased, and the
+                variance due to the board is removed.
+    qmc         randomized quasi-Monte Carlo: a rank-1 lattice with a
+                random shift, mapped to deals card by card (board cards
+                first). The lattice covers the board dimensions far more
+                evenly than independent points.
+"""
+import itertools
+from math import comb
+
+import numpy as np
+
+from cards import NUM_CARDS
+from vector_sim import _showdown, remaining_deck
+
+SAMPLERS = ('random', 'stratified', 'qmc')
+
+# Points per QMC replicate (a prime, so every lattice coordinate is a
+# permutation of the points) and the Korobov generator of the lattice
+QMC_POINTS = 1021
+QMC_GENERATOR = 76
+
+# Stratify on whole runouts up to this many (the flop has 1081), else on the next card
+STRATIFIED_MAX_STRATA = 2000
+
+# Deals scored per call are capped so the (deals, cards) temporaries stay small
+MAX_BLOCK_DEALS = 65536
+
+
+def replicate_size(sampler, hero, board, num_opponents):
+    """Deals per replicate"""
+    if sampler == 'stratified':
+        return len(_strata(NUM_CARDS - len(hero) - len(board), 5 - len(board)))
+    if sampler == 'qmc':
+        return QMC_POINTS
+    return 1
+
+
+def sample(sampler, hero, board, num_opponents, replicates, rng, available=None):
+    """
+    Runs `replicates` independent replicates of a sampler.
+    hero, board: lists of card indices (see cards.py)
+    available: the remaining deck if the caller has it (HandState.deck())
+    Returns (win, tie) arrays with each replicate's mean win and tie rate
+    (0..1), one entry per replicate.
+    """
+    if available is None:
+        available = remaining_deck(hero, board)
+    cards_needed = num_opponents * 2 + 5 - len(board)
+    if replicates <= 0 or len(available) < cards_needed:
+        return np.zeros(0), np.zeros(0)
+
+    size = replicate_size(sampler, hero, board, num_opponents)
+    per_block = max(1, MAX_BLOCK_DEALS // size)
+    wins, ties = [], []
+    for start in range(0, replicates, per_block):
+        count = min(per_block, replicates - start)
+        dealt = _SAMPLERS[sampler](available, cards_needed, 5 - len(board), count, rng)
+        win, tie = _score(hero, board, num_opponents, dealt)
+        wins.append(win.reshape(count, size).mean(axis=1))
+        ties.append(tie.reshape(count, size).mean(axis=1))
+    return np.concatenate(wins), np.concatenate(ties)
+
+
+def _score(hero, board, num_opponents, dealt):
+    """Win and tie indicators per deal. Layout of a deal: [board fill, opp1, opp1, opp2, opp2, ...]"""
+    board_needed = 5 - len(board)
+    full_board = np.empty((len(dealt), 5), dtype=np.int64)
+    full_board[:, :len(board)] = board
+    full_board[:, len(board):] = dealt[:, :board_needed]
+    opp_holes = dealt[:, board_needed:].reshape(len(dealt), num_opponents, 2)
+    hero_ranks, best_opp = _showdown(hero, full_board, opp_holes)
+    # Lower rank is better
+    return hero_ranks < best_opp, hero_ranks == best_opp
+
+
+def _random_order(rng, rows, size):
+    """Uniformly random ordering of `size` positions for every row"""
+    return np.argsort(rng.random((rows, size)), axis=1)
+
+
+def _random_deals(available, cards_needed, board_needed, replicates, rng):
+    order = _random_order(rng, replicates, len(available))[:, :cards_needed]
+    return available[order]
+
+
+_strata_cache = {}
+
+
+def _strata(size, board_needed):
+    """
+    Positions (into the unknown deck) fixed by each stratum: every board
+    runout if there are few enough, otherwise every single next card
+    (the first opponent card on the river)
+    """
+    key = (size, board_needed)
+    if key not in _strata_cache:
+        if 0 < board_needed and comb(size, board_needed) <= STRATIFIED_MAX_STRATA:
+            strata = np.array(list(itertools.combinations(range(size), board_needed)), dtype=np.int64)
+        else:
+            strata = np.arange(size, dtype=np.int64)[:, None]
+        _strata_cache[key] = strata
+    return _strata_cache[key]
+
+
+def _stratified_deals(available, cards_needed, board_needed, replicates, rng):
+    # Row k of every replicate deals stratum k first, the rest at random
+    size = len(available)
+    strata = _strata(size, board_needed)
+    fixed = np.tile(strata, (replicates, 1))
+    rows = len(fixed)
+    keys = rng.random((rows, size))
+    keys[np.arange(rows)[:, None], fixed] = 2.0
+    rest = np.argsort(keys, axis=1)[:, :cards_needed - fixed.shape[1]]
+    return available[np.concatenate([fixed, rest], axis=1)]
+
+
+def _qmc_deals(available, cards_needed, board_needed, replicates, rng):
+    # Rank-1 lattice points in [0, 1)^cards_needed, one random shift per replicate
+    generator = np.ones(cards_needed, dtype=np.int64)
+    for j in range(1, cards_needed):
+        generator[j] = generator[j - 1] * QMC_GENERATOR % QMC_POINTS
+    lattice = np.arange(QMC_POINTS)[:, None] * generator[None, :] % QMC_POINTS / QMC_POINTS
+    shifts = rng.random((replicates, 1, cards_needed))
+    points = ((lattice[None] + shifts) % 1.0).reshape(-1, cards_needed)
+    return _deal_from_uniforms(available, points)
+
+
+def _deal_from_uniforms(available, points):
+    """
+    Partial Fisher-Yates shuffle driven by the given uniforms: coordinate j
+    picks one of the cards left. Uniform points give uniform deals.
+    """
+    rows, cards_needed = points.shape
+    size = len(available)
+    decks = np.tile(available, (rows, 1))
+    index = np.arange(rows)
+    for j in range(cards_needed):
+        swap = j + np.minimum((points[:, j] * (size - j)).astype(np.int64), size - j - 1)
+        picked = decks[index, swap]
+        decks[index, swap] = decks[:, j]
+        decks[:, j] = picked
+    return decks[:, :cards_needed]
+
+
+_SAMPLERS = {
+    'random': _random_deals,
+    'stratified': _stratified_deals,
+    'qmc': _qmc_deals,
+}
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 import cv2
@@ -7,35 +7,299 @@ import numpy as np
 import base64
 import json
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from treys import Card
 
 # Local imports
-from detector import CardDetector
+from batching import InferenceBatcher
+from detector import DEFAULT_MODEL, CardDetector
+from equity_cache import EquityCache
+from ingest import LatestFrameSlot
+from metrics import FRAMES_DROPPED, FRAMES_PROCESSED, FRAMES_RECEIVED, REGISTRY, STAGE_SECONDS
+from protocol import ProtocolError, unpack_frame
 from poker import PokerEngine
+from preprocess import FramePreprocessor
+from sessions import SessionLimitError, SessionManager
+from sim_pool import SimulationPool
+from tracker import CardTracker
 from ui import draw_ui
 
-app = FastAPI()
+# Simulation worker processes, started once for the lifetime of the server
+sim_pool = SimulationPool()
+
+# Blocking work never runs on the event loop:
+# - JPEG decode on a small thread pool (cv2 releases the GIL)
+# - batched YOLO inference on a single thread (the model is not thread-safe)
+# - calculate_odds on a small thread pool, which hands Monte Carlo to sim_pool
+decode_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="decode")
+detect_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="detect")
+odds_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="odds")
+
+# Each frame first gets a one-chunk estimate (budget 0), then "odds" messages
+# refine it in steps of ODDS_REFINE_STEP seconds until ODDS_TARGET_SE is reached
+ODDS_QUICK_BUDGET = 0
+ODDS_REFINE_STEP = 0.1
+ODDS_TARGET_SE = 0.25
+
+# One engine per table; equities don't depend on the table so the cache is shared
+equity_cache = EquityCache(maxsize=16384)
+sessions = SessionManager(lambda: PokerEngine(pool=sim_pool, cache=equity_cache,
+                                              time_budget=ODDS_REFINE_STEP, target_se=ODDS_TARGET_SE))
+SESSION_SWEEP_INTERVAL = 30
+
+async def evict_idle_sessions():
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        evicted = sessions.evict_idle()
+        if evicted:
+            print(f"Evicted {len(evicted)} idle session(s)")
+
+@asynccontextmanager
+async def lifespan(app):
+    # Nothing slow happens before the server accepts connections: workers
+    # spawn and the model loads (plus a warmup pass) in the background.
+    # Until /ready says so, frames just come back without cards.
+    sim_pool.start(wait=False)
+    detector.load_async()
+    batcher.start()
+    sweeper = asyncio.create_task(evict_idle_sessions())
+    yield
+    sweeper.cancel()
+    await batcher.stop()
+    decode_executor.shutdown(wait=False, cancel_futures=True)
+    detect_executor.shutdown(wait=False, cancel_futures=True)
+    odds_executor.shutdown(wait=False, cancel_futures=True)
+    sim_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # Setup templates
 templates = Jinja2Templates(directory="templates")
 
 # Initialize global components
-detector = CardDetector()
-poker = PokerEngine()
+# An exported int8 .onnx / OpenVINO .xml model (export_detector.py) runs much
+# faster on CPU; measure its accuracy first with detector_accuracy.py
+DETECTOR_MODEL = DEFAULT_MODEL
+detector = CardDetector(DETECTOR_MODEL, lazy=True)
+
+# Frames from all sessions share batched forward passes. Raising the wait
+# trades per-frame latency for bigger batches (throughput).
+DETECT_MAX_BATCH = 8
+DETECT_MAX_WAIT_MS = 10
+batcher = InferenceBatcher(detector, detect_executor, max_batch_size=DETECT_MAX_BATCH, max_wait_ms=DETECT_MAX_WAIT_MS)
+
+# Keyframes are cropped to the learned card regions (with periodic full-frame
+# passes) before inference; False only downscales to the model input size
+PREPROCESS_ROI = True
 
 @app.get("/", response_class=HTMLResponse)
 async def get(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+@app.get("/ready")
+async def readiness():
+    """200 once the detector is warm and the simulation workers are up, 503 until then"""
+    status = {
+        "ready": detector.ready and sim_pool.ready,
+        "detector": detector.status,
+        "simulation_pool": "ready" if sim_pool.ready else "starting",
+    }
+    if detector.error:
+        status["error"] = detector.error
+    if detector.load_seconds is not None:
+        status["model_load_seconds"] = round(detector.load_seconds, 3)
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/sessions")
+async def session_metrics():
+    metrics = sessions.metrics()
+    metrics["equity_cache"] = equity_cache.stats()
+    metrics["inference"] = batcher.stats()
+    return metrics
+
+# Values kept elsewhere are read when /metrics is scraped
+REGISTRY.callback('poker_equity_cache_hits_total', 'Equity cache hits', lambda: equity_cache.hits, 'counter')
+REGISTRY.callback('poker_equity_cache_misses_total', 'Equity cache misses', lambda: equity_cache.misses, 'counter')
+REGISTRY.callback('poker_equity_cache_entries', 'Spots in the equity cache', lambda: len(equity_cache))
+REGISTRY.callback('poker_inference_batches_total', 'Batched detector forward passes', lambda: batcher.batches, 'counter')
+REGISTRY.callback('poker_inference_frames_total', 'Frames run through the detector', lambda: batcher.frames, 'counter')
+REGISTRY.callback('poker_ready', '1 once the detector is warm and the simulation workers are up',
+                  lambda: int(detector.ready and sim_pool.ready))
+REGISTRY.callback('poker_sessions', 'Live sessions', lambda: len(sessions.sessions))
+REGISTRY.callback('poker_sessions_created_total', 'Sessions created', lambda: sessions.created_total, 'counter')
+REGISTRY.callback('poker_sessions_evicted_total', 'Sessions evicted while idle', lambda: sessions.evicted_total, 'counter')
+REGISTRY.callback('poker_sessions_rejected_total', 'Connections rejected at the session limit',
+                  lambda: sessions.rejected_total, 'counter')
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def decode_frame(message):
+    """Decodes an image message into a BGR frame, or None if invalid"""
+    if 'jpeg' in message:
+        # Binary protocol: decode straight from the received buffer
+        nparr = np.frombuffer(message['jpeg'], np.uint8)
+    else:
+        # Legacy JSON message with a base64 JPEG data URL
+        encoded_data = message['data'].split(',')[1]
+        nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
+    if nparr.size == 0:
+        return None
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+async def process_frame(websocket, poker, message, slot, tracker, preprocessor):
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        with STAGE_SECONDS.time('decode'):
+            frame = await loop.run_in_executor(decode_executor, decode_frame, message)
+    except Exception as e:
+        print(f"Image decode error: {e}")
+        return
+    if frame is None:
+        return
+
+    # Update settings
+    num_players = int(message.get('num_players', 2))
+    poker.set_num_players(num_players)
+
+    # Detection & Logic
+    try:
+        # Full detection on keyframes only, tracked boxes in between
+        with STAGE_SECONDS.time('keyframe_check'):
+            keyframe = await loop.run_in_executor(decode_executor, tracker.needs_detection, frame)
+        if keyframe:
+            # Downscale and crop to the card regions (the whole frame on a scene change: new cards
+            # can be anywhere); the crops share the batch with other sessions
+            with STAGE_SECONDS.time('preprocess'):
+                prepared = await loop.run_in_executor(decode_executor, preprocessor.prepare, frame,
+                                                      tracker.scene_change)
+            # Includes the wait for the batch to fill
+            with STAGE_SECONDS.time('detect'):
+                results = await asyncio.gather(*[batcher.detect(image) for image, _ in prepared])
+            detections = preprocessor.merge(prepared, results)
+            with STAGE_SECONDS.time('track'):
+                cards = await loop.run_in_executor(decode_executor, tracker.update, frame, detections)
+        else:
+            with STAGE_SECONDS.time('track'):
+                cards = await loop.run_in_executor(decode_executor, tracker.propagate, frame)
+
+        with STAGE_SECONDS.time('update_state'):
+            poker.update_state(cards)
+
+        # Capture the cards now so the response matches what the odds were computed for
+        hero_cards = [Card.int_to_str(c) for c in poker.hero_hand]
+        community_cards = [Card.int_to_str(c) for c in poker.community_cards]
+        hero_locked = poker.hero_hand_locked
+        version = poker.state_version
+
+        with STAGE_SECONDS.time('calculate_odds'):
+            odds = await loop.run_in_executor(odds_executor, poker.calculate_odds, ODDS_QUICK_BUDGET)
+
+        response = {
+            "type": "result",
+            "odds": odds,
+            "cards": [c['label'] for c in cards], # debug info for detected
+            "hero_hand": hero_cards,
+            "community_cards": community_cards,
+            "hero_locked": hero_locked,
+            # Lets the client pace its frames to what the server can keep up with
+            "processing_ms": (time.perf_counter() - start) * 1000,
+            "dropped_frames": slot.dropped,
+            "keyframe": keyframe,
+            "seq": message.get('seq')
+        }
+
+        await websocket.send_json(response)
+        STAGE_SECONDS.observe(time.perf_counter() - start, 'total')
+        FRAMES_PROCESSED.inc(1, 'true' if keyframe else 'false')
+        return odds, version
+
+    except Exception as e:
+        print(f"Processing error: {e}")
+        await websocket.send_json({"type": "error", "message": str(e)})
+
+async def refine_odds(websocket, poker, version, seq):
+    """Streams progressively better "odds" for one frame until they converge or the state changes"""
+    loop = asyncio.get_running_loop()
+    while poker.state_version == version:
+        with STAGE_SECONDS.time('refine_odds'):
+            odds = await loop.run_in_executor(odds_executor, poker.calculate_odds)
+        # A control message may have changed the hand while we were sampling
+        if poker.state_version != version:
+            return
+        await websocket.send_json({"type": "odds", "odds": odds, "seq": seq})
+        if poker.is_converged(odds):
+            return
+
+async def frame_worker(websocket, poker, slot, tracker, preprocessor):
+    # Always works on the newest frame; older ones are dropped by the slot
+    refine_task = None
+    try:
+        while True:
+            message = await slot.get()
+            # A newer frame replaces whatever refinement is still running. A
+            # calculate_odds already on the executor finishes first (the engine
+            # runs one at a time) and its result is dropped with the task.
+            if refine_task is not None:
+                refine_task.cancel()
+            processed = await process_frame(websocket, poker, message, slot, tracker, preprocessor)
+            if processed is not None:
+                odds, version = processed
+                if not poker.is_converged(odds):
+                    refine_task = asyncio.create_task(refine_odds(websocket, poker, version, message.get('seq')))
+    finally:
+        if refine_task is not None:
+            refine_task.cancel()
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+
+    # Phones at the same table can share state by passing ?table=<id>
+    try:
+        session = sessions.acquire(websocket.query_params.get('table'))
+    except SessionLimitError as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close(code=1013)
+        return
+    poker = session.engine
+    await websocket.send_json({"type": "session", "id": session.id, "number": session.number})
+
+    # At most one frame is processed at a time; the receive loop keeps
+    # handling control messages while it is in flight
+    slot = LatestFrameSlot()
+    # Tracking state belongs to this camera, not to the (possibly shared) table
+    tracker = CardTracker()
+    preprocessor = FramePreprocessor(input_size=detector.input_size, roi=PREPROCESS_ROI)
+    frame_task = asyncio.create_task(frame_worker(websocket, poker, slot, tracker, preprocessor))
     try:
         while True:
-            # Receive base64 image from client
-            data = await websocket.receive_text()
-            
-            # Message format: { "type": "image"|"lock"|"reset", ... }
-            message = json.loads(data)
+            received = await websocket.receive()
+            if received['type'] == 'websocket.disconnect':
+                raise WebSocketDisconnect(received.get('code', 1000))
+            session.touch()
+
+            # Binary message: frame header + raw JPEG bytes (see protocol.py)
+            if received.get('bytes') is not None:
+                try:
+                    frame_message = unpack_frame(received['bytes'])
+                except ProtocolError as e:
+                    print(f"Bad frame message: {e}")
+                    continue
+                if frame_message['session'] != session.number:
+                    continue
+                frame_message['type'] = 'image'
+                FRAMES_RECEIVED.inc()
+                if slot.put(frame_message):
+                    FRAMES_DROPPED.inc()
+                continue
+
+            # Text message format: { "type": "lock"|"reset"|..., ... }
+            message = json.loads(received['text'])
             
             msg_type = message.get('type')
             
@@ -52,56 +316,28 @@ async def websocket_endpoint(websocket: WebSocket):
                 success = poker.set_manual_card(message.get('card_type'), message.get('index'), message.get('label'))
                 await websocket.send_json({"type": "manual_ack", "success": success})
 
+            elif msg_type == 'set_range':
+                # { type: 'set_range', seat: 0..7, range: 'QQ+, AKs' } (empty range = random hand)
+                try:
+                    poker.set_opponent_range(int(message.get('seat', 0)), message.get('range') or None)
+                    await websocket.send_json({"type": "range_ack", "success": True, "seat": message.get('seat', 0)})
+                except ValueError as e:
+                    await websocket.send_json({"type": "range_ack", "success": False, "message": str(e)})
+
             elif msg_type == 'reset':
                 poker.reset_hand()
+                tracker.reset()
+                preprocessor.reset()
                 await websocket.send_json({"type": "reset_ack"})
             
             elif msg_type == 'image':
-                try:
-                    # Decode image
-                    encoded_data = message['data'].split(',')[1]
-                    nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
-                    
-                    if nparr.size == 0:
-                        continue
-                        
-                    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    
-                    if frame is None:
-                        continue
-                except Exception as e:
-                    print(f"Image decode error: {e}")
-                    continue
-
-                # Update settings
-                num_players = int(message.get('num_players', 2))
-                poker.set_num_players(num_players)
-
-                # Detection & Logic
-                try:
-                    cards = detector.detect(frame)
-                    poker.update_state(cards)
-                    odds = poker.calculate_odds()
-                    
-                    # Add hero info to response
-                    from treys import Card
-                    hero_cards = [Card.int_to_str(c) for c in poker.hero_hand]
-                    community_cards = [Card.int_to_str(c) for c in poker.community_cards]
-                    
-                    response = {
-                        "type": "result",
-                        "odds": odds,
-                        "cards": [c['label'] for c in cards], # debug info for detected
-                        "hero_hand": hero_cards,
-                        "community_cards": community_cards,
-                        "hero_locked": poker.hero_hand_locked
-                    }
-                    
-                    await websocket.send_json(response)
-                
-                except Exception as e:
-                    print(f"Processing error: {e}")
-                    await websocket.send_json({"type": "error", "message": str(e)})
+                # Legacy base64 data URL frames
+                FRAMES_RECEIVED.inc()
+                if slot.put(message):
+                    FRAMES_DROPPED.inc()
 
     except WebSocketDisconnect:
         print("Client disconnected")
+    finally:
+        frame_task.cancel()
+        sessions.release(session)
@@ -0,0 +1,117 @@
+import os
+import resource
+import threading
+import time
+import uuid
+
+
+class SessionLimitError(Exception):
+    pass
+
+
+class Session:
+    """One table: a PokerEngine plus bookkeeping for eviction"""
+
+    def __init__(self, session_id, engine, named=False, number=0):
+        self.id = session_id
+        # Compact numeric handle used in binary frame headers (see protocol.py)
+        self.number = number
+        self.engine = engine
+        # Named (table ID) sessions outlive their connections until idle eviction
+        self.named = named
+        self.created = time.monotonic()
+        self.last_seen = self.created
+        self.connections = 0
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def idle_for(self):
+        return time.monotonic() - self.last_seen
+
+
+def _rss_bytes():
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+class SessionManager:
+    """
+    Creates one engine per table ID (or per connection when no ID is given),
+    evicts sessions that have been idle too long and caps how many exist at once.
+    """
+
+    def __init__(self, engine_factory, max_sessions=64, idle_timeout=600):
+        self.engine_factory = engine_factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.created_total = 0
+        self.evicted_total = 0
+        self.rejected_total = 0
+        self._next_number = 1
+        self._lock = threading.Lock()
+
+    def acquire(self, table_id=None):
+        """
+        Returns the session for `table_id`, creating it if needed.
+        Raises SessionLimitError when the server is full.
+        """
+        with self._lock:
+            session = self.sessions.get(table_id) if table_id else None
+            if session is None:
+                if len(self.sessions) >= self.max_sessions:
+                    self._evict_idle_locked()
+                if len(self.sessions) >= self.max_sessions:
+                    self.rejected_total += 1
+                    raise SessionLimitError(f"Session limit reached ({self.max_sessions})")
+                session = Session(table_id or uuid.uuid4().hex, self.engine_factory(),
+                                  named=bool(table_id), number=self._next_number)
+                self._next_number = (self._next_number + 1) % (1 << 32) or 1
+                self.sessions[session.id] = session
+                self.created_total += 1
+
+            session.connections += 1
+            session.touch()
+            return session
+
+    def release(self, session):
+        """Called when a connection closes. Per-connection sessions are dropped right away."""
+        with self._lock:
+            session.connections -= 1
+            session.touch()
+            if session.connections <= 0 and not session.named:
+                self.sessions.pop(session.id, None)
+
+    def evict_idle(self):
+        """Drops sessions with no connections that have been idle past the timeout"""
+        with self._lock:
+            return self._evict_idle_locked()
+
+    def _evict_idle_locked(self):
+        evicted = [
+            s.id for s in self.sessions.values()
+            if s.connections <= 0 and s.idle_for() > self.idle_timeout
+        ]
+        for session_id in evicted:
+            del self.sessions[session_id]
+        self.evicted_total += len(evicted)
+        return evicted
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "sessions": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "connections": sum(s.connections for s in self.sessions.values()),
+                "created_total": self.created_total,
+                "evicted_total": self.evicted_total,
+                "rejected_total": self.rejected_total,
+                "rss_bytes": _rss_bytes()
+            }
@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import vector_sim
+from hand_evaluator import get_evaluator
+
+
+def _init_worker():
+    # Map the evaluator tables once per worker instead of once per task
+    get_evaluator()
+
+
+def _simulate_chunk(hero, board, num_opponents, iterations, seed_seq, opponent_ranges=None, available=None):
+    rng = np.random.default_rng(seed_seq)
+    if opponent_ranges is not None:
+        return vector_sim.simulate_ranges(hero, board, opponent_ranges, iterations, rng)
+    return vector_sim.simulate(hero, board, num_opponents, iterations, rng, available)
+
+
+class SimulationPool:
+    """
+    Long-lived process pool for Monte Carlo simulation.
+
+    Iterations are split into fixed-size chunks and every chunk gets its own
+    RNG stream spawned from the request seed. Which worker runs a chunk does
+    not matter, so results for a given seed are reproducible regardless of
+    the number of workers.
+    """
+
+    def __init__(self, workers=None, chunk_size=5000):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.executor = None
+        self._started = []
+
+    def start(self, wait=True):
+        """
+        Starts every worker now so the first request doesn't pay for imports.
+        wait=False returns at once; `ready` tells when the workers are up
+        (simulations submitted meanwhile just queue).
+        """
+        if self.executor is None:
+            # spawn: forking a process that already runs threads (uvicorn, torch) is unsafe
+            context = multiprocessing.get_context('spawn')
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_init_worker)
+            self._started = [self.executor.submit(os.getpid) for _ in range(self.workers)]
+        if wait:
+            for future in self._started:
+                future.result()
+        return self
+
+    @property
+    def ready(self):
+        return self.executor is not None and all(future.done() for future in self._started)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def submit(self, hero, board, num_opponents, iterations, seed=None, opponent_ranges=None, available=None):
+        """
+        Schedules a simulation across the pool.
+        opponent_ranges: optional list of ranges.Range (or None) per opponent
+        available: the remaining deck if the caller has it, sent along with every chunk
+        Returns a list of futures, one per chunk, each resolving to (wins, ties).
+        """
+        if self.executor is None:
+            self.start()
+
+        chunks = [self.chunk_size] * (iterations // self.chunk_size)
+        if iterations % self.chunk_size:
+            chunks.append(iterations % self.chunk_size)
+
+        seed_seqs = np.random.SeedSequence(seed).spawn(len(chunks))
+        return [
+            self.executor.submit(_simulate_chunk, list(hero), list(board), num_opponents, n, seed_seq, opponent_ranges,
+                                 available)
+            for n, seed_seq in zip(chunks, seed_seqs)
+        ]
+
+    def simulate(self, hero, board, num_opponents, iterations, seed=None, opponent_ranges=None, available=None):
+        """
+        Same contract as vector_sim.simulate (or simulate_ranges): returns the
+        merged (wins, ties) (plus the effective sample size with ranges)
+        """
+        totals = None
+        for future in self.submit(hero, board, num_opponents, iterations, seed, opponent_ranges, available):
+            result = future.result()
+            totals = result if totals is None else tuple(a + b for a, b in zip(totals, result))
+        return totals if totals is not None else (0, 0)
@@ -0,0 +1,41 @@
+import os
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def is_live(source):
+    """Camera indices ("0", "1", ...) are live; files and directories are replays"""
+    return str(source).isdigit()
+
+
+def read_frames(source):
+    """
+    Yields BGR frames from a camera index, a video file or a directory of
+    images (sorted by name). Raises ValueError if the source can't be opened.
+    """
+    source = str(source)
+    if os.path.isdir(source):
+        paths = sorted(p for p in os.listdir(source) if p.lower().endswith(IMAGE_EXTENSIONS))
+        if not paths:
+            raise ValueError(f"No images in {source}")
+        for name in paths:
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is None:
+                print(f"Skipping unreadable image: {name}")
+                continue
+            yield frame
+        return
+
+    cap = cv2.VideoCapture(int(source) if is_live(source) else source)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open {source}")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
@@ -2,12 +2,20 @@ import uvicorn
 import threading
 import time
 import sys
+import json
+import urllib.error
+import urllib.request
 from pyngrok import ngrok, conf
 
 import os
 import signal
 import subprocess
 
+PORT = 8000
+# How long to wait for the model to load and warm up before going live anyway
+READY_TIMEOUT = 120
+READY_POLL_INTERVAL = 0.1
+
 def kill_existing_process(port=8000):
     try:
         # Initial cleanup: Find processes using the port and kill them
@@ -23,28 +31,60 @@ def kill_existing_process(port=8000):
         print(f"Warning cleaning up port: {e}")
 
 def start_server():
-    # Kill old instance
-    kill_existing_process(8000)
     # Start the FastAPI server on port 8000
-    uvicorn.run("server:app", host="0.0.0.0", port=8000, log_level="error")
+    uvicorn.run("server:app", host="0.0.0.0", port=PORT, log_level="error")
+
+def wait_until_ready(port=PORT, timeout=READY_TIMEOUT):
+    """
+    Polls /ready until the server reports ready, the model failed to load, or
+    `timeout` runs out. Returns the last status (None if the server never answered).
+    """
+    url = f"http://127.0.0.1:{port}/ready"
+    start = time.perf_counter()
+    status = None
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                status = json.load(response)
+        except urllib.error.HTTPError as e:
+            # 503 while loading, with the status in the body
+            if status is None:
+                print(f"Server accepting connections after {time.perf_counter() - start:.2f}s, loading model...")
+            status = json.load(e)
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass # Not listening yet
+        if status is not None and (status.get("ready") or status.get("detector") == "failed"):
+            break
+        time.sleep(READY_POLL_INTERVAL)
+    return status
 
 def main():
     print("---------------------------------------------------------")
     print("Starting Poker Odds Bot (Secure Mobile Access)")
     print("---------------------------------------------------------")
 
+    # Kill old instance first, so polling can't reach it
+    kill_existing_process(PORT)
+
     # Start the server in a separate thread
     server_thread = threading.Thread(target=start_server)
     server_thread.daemon = True
     server_thread.start()
 
-    # Wait a moment for server to spin up
-    time.sleep(2)
+    # Wait for the model to load and warm up
+    start = time.perf_counter()
+    status = wait_until_ready()
+    if status is None:
+        print(f"Warning: server did not answer within {READY_TIMEOUT}s")
+    elif status.get("ready"):
+        print(f"Server ready after {time.perf_counter() - start:.2f}s")
+    else:
+        print(f"Warning: server not ready ({status}); cards won't be detected until it is")
 
     try:
         # Open a Ngrok tunnel to the server
         # This provides a public HTTPS URL that mobile phones prefer
-        public_url = ngrok.connect(8000).public_url
+        public_url = ngrok.connect(PORT).public_url
         print("\n" + "="*60)
         print(f"SUCCESS! Your App is Live.")
         print("="*60)
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+
+import batch_equity
+from batch_equity import run_batch
+
+SPOTS = [
+    {"id": "river", "hero": "AhKh", "board": "Qh7h2c3d9s", "num_players": 2},
+    {"id": "flop", "hero": "AhKh", "board": "Qh7h2c", "num_players": 6},
+    {"id": "preflop", "hero": "AsAd", "board": "", "num_players": 2},
+    {"id": "bad", "hero": "AhAh", "board": "", "num_players": 2},
+]
+BAD_LINES = ['{"hero": "AhKh", "board": \n', '[1, 2]\n', '{"hero": 5, "num_players": 2}\n']
+
+def verify_batch_equity():
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            spots_path = os.path.join(tmp, 'spots.jsonl')
+            with open(spots_path, 'w') as f:
+                lines = [json.dumps(spot) + '\n' for spot in SPOTS * 5]
+                # Unreadable lines still get a record each, so resuming stays aligned
+                lines[10:10] = BAD_LINES
+                f.write(''.join(lines))
+
+            full_path = os.path.join(tmp, 'full.jsonl')
+            run_batch(spots_path, full_path, iterations=5000, workers=1, chunk_size=3, verbose=False)
+            with open(full_path) as f:
+                full = f.read()
+            records = [json.loads(line) for line in full.splitlines()]
+            print(f"Methods: {[r.get('method', r.get('error')) for r in records[:4]]}")
+
+            # Interrupted run: 7 complete records and half of the 8th
+            lines = full.splitlines(keepends=True)
+            resumed_path = os.path.join(tmp, 'resumed.jsonl')
+            with open(resumed_path, 'w') as f:
+                f.write(''.join(lines[:7]) + lines[7][:20])
+            # Tiny blocks: the partial line and the record count span several reads
+            batch_equity.READ_BLOCK_SIZE = 7
+            processed = run_batch(spots_path, resumed_path, iterations=5000, workers=1, chunk_size=3, verbose=False)
+            with open(resumed_path) as f:
+                resumed = f.read()
+            print(f"Resumed run processed {processed} spots")
+
+        bad = records[10:13]
+        print(f"Bad lines: {[(r['id'], r.get('error')) for r in bad]}")
+        if len(records) != 23 or [r.get('method') for r in records[:3]] != ['exact', 'monte_carlo', 'preflop']:
+            print("FAILURE: Unexpected batch results.")
+        elif 'error' not in records[3]:
+            print("FAILURE: Invalid spot was not reported.")
+        elif any('error' not in r for r in bad) or [r['id'] for r in bad] != [10, 11, 12] or records[13]['id'] != 'preflop':
+            print("FAILURE: Unreadable lines did not get one error record each.")
+        elif processed != 16 or resumed != full:
+            print("FAILURE: Resumed run does not match an uninterrupted one.")
+        else:
+            print("SUCCESS: Batch equity streams, resumes and is reproducible.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    verify_batch_equity()
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batching import InferenceBatcher
+
+
+class FakeDetector:
+    """Records every batch; each frame's "detections" are the frame itself"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def detect_batch(self, frames):
+        self.batches.append(list(frames))
+        if self.fail:
+            raise RuntimeError("detector crashed")
+        return [[frame] for frame in frames]
+
+
+async def run_batches(detector, frames, cancel=(), **options):
+    """Sends `frames` at once (cancelling the requests in `cancel`); returns results and seconds taken"""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        batcher = InferenceBatcher(detector, executor, **options)
+        batcher.start()
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(batcher.detect(frame)) for frame in frames]
+        # Let every request reach the queue before giving up on some
+        await asyncio.sleep(0)
+        for index in cancel:
+            tasks[index].cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        await batcher.stop()
+    return results, elapsed
+
+
+def verify_batching():
+    print("Testing the inference batcher...")
+    try:
+        # Full batches go out without waiting for the timeout
+        detector = FakeDetector()
+        results, elapsed = asyncio.run(run_batches(detector, list(range(8)), max_batch_size=4, max_wait_ms=2000))
+        print(f"Full batches: {detector.batches} in {elapsed * 1000:.0f} ms")
+        assert detector.batches == [[0, 1, 2, 3], [4, 5, 6, 7]] and elapsed < 1.0
+        assert results == [[frame] for frame in range(8)]
+
+        # A partial batch goes out once the first frame has waited max_wait_ms
+        detector = FakeDetector()
+        results, elapsed = asyncio.run(run_batches(detector, [0, 1, 2], max_batch_size=8, max_wait_ms=50))
+        print(f"Partial batch: {detector.batches} after {elapsed * 1000:.0f} ms")
+        assert detector.batches == [[0, 1, 2]] and 0.045 <= elapsed < 1.0
+
+        # Requests that gave up are left out of the batch
+        detector = FakeDetector()
+        results, _ = asyncio.run(run_batches(detector, [0, 1, 2], cancel=[1], max_batch_size=8, max_wait_ms=50))
+        assert detector.batches == [[0, 2]] and isinstance(results[1], asyncio.CancelledError)
+        assert results[0] == [0] and results[2] == [2]
+
+        # A detector error reaches every frame of the batch
+        detector = FakeDetector(fail=True)
+        results, _ = asyncio.run(run_batches(detector, [0, 1, 2], max_batch_size=8, max_wait_ms=20))
+        print(f"Failed batch: {[repr(r) for r in results]}")
+        assert all(isinstance(r, RuntimeError) and str(r) == "detector crashed" for r in results)
+
+        print("SUCCESS: Batches flush on size and timeout, skip cancelled frames and report errors.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_batching()
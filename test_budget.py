@@ -0,0 +1,42 @@
+import time
+
+from treys import Card
+from poker import PokerEngine
+
+def verify_budget():
+    try:
+        poker = PokerEngine(cache_size=0)
+        poker.hero_hand = [Card.new('Ah'), Card.new('Kh')]
+        poker.community_cards = [Card.new('Qh'), Card.new('7h'), Card.new('2c'), Card.new('3d')]
+        poker.set_num_players(2)
+        exact_odds = poker.calculate_odds()
+
+        # Same spot sampled to a target precision
+        poker.exact_limit = 0
+        precise = poker.calculate_odds(target_se=0.3)
+        print(f"Target SE: {precise['win_rate']:.2f}% ±{precise['std_error']:.3f} after {precise['iterations']} iterations")
+
+        # 9-handed flop under a time budget
+        poker.community_cards = poker.community_cards[:3]
+        poker.set_num_players(9)
+        start = time.perf_counter()
+        timed = poker.calculate_odds(time_budget=0.1)
+        elapsed = time.perf_counter() - start
+        print(f"Time budget: {timed['iterations']} iterations in {elapsed:.3f}s, CI [{timed['ci_low']:.2f}, {timed['ci_high']:.2f}]")
+
+        if precise['std_error'] > 0.3:
+            print("FAILURE: Target standard error was not reached.")
+        elif not precise['ci_low'] - 0.5 <= exact_odds['win_rate'] <= precise['ci_high'] + 0.5:
+            print("FAILURE: Exact equity is far outside the confidence interval.")
+        elif elapsed > 1.0 or timed['iterations'] <= 0:
+            print("FAILURE: Time budget was not respected.")
+        else:
+            print("SUCCESS: Budgets are honored and intervals cover the exact equity.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    verify_budget()
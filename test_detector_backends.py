@@ -0,0 +1,86 @@
+import os
+import tempfile
+
+import numpy as np
+
+from detector import CardDetector, letterbox
+from detector_accuracy import card_scores
+
+# A fake exported YOLOv8 model: 64x64 input, a constant (1, 4 + classes, anchors) output
+NAMES = {0: '10H', 1: 'AS', 2: 'KD'}
+SIZE = 64
+
+
+def build_model(path):
+    import onnx
+    from onnx import TensorProto, helper
+
+    # Columns: cx, cy, w, h, then one score per class
+    anchors = np.array([
+        [20, 32, 10, 20, 0.0, 0.9, 0.0],   # AS
+        [21, 32, 10, 20, 0.0, 0.8, 0.0],   # AS again, overlapping: removed by NMS
+        [40, 32, 10, 20, 0.7, 0.0, 0.0],   # 10H
+        [50, 10, 10, 20, 0.0, 0.0, 0.3],   # KD below the confidence threshold
+    ], dtype=np.float32).T[np.newaxis]
+    output = helper.make_tensor('raw', TensorProto.FLOAT, anchors.shape, anchors.flatten())
+    graph = helper.make_graph(
+        [helper.make_node('Constant', [], ['output0'], value=output)], 'fake_yolo',
+        [helper.make_tensor_value_info('images', TensorProto.FLOAT, [1, 3, SIZE, SIZE])],
+        [helper.make_tensor_value_info('output0', TensorProto.FLOAT, anchors.shape)])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 17)])
+    model.ir_version = 8
+    helper.set_model_props(model, {'names': str(NAMES)})
+    onnx.save(model, path)
+
+
+def verify_detector_backends():
+    print("Testing the ONNX detector backend and lazy loading...")
+    try:
+        try:
+            import onnx
+            import onnxruntime
+        except ImportError:
+            print("SKIPPED: onnx / onnxruntime not installed")
+            return
+
+        # Letterboxing a 128x64 frame into 64x64: half scale, 16 px bands top and bottom
+        frame = np.zeros((64, 128, 3), dtype=np.uint8)
+        tensor, scale, pad = letterbox(frame, SIZE)
+        assert tensor.shape == (3, SIZE, SIZE) and scale == 0.5 and pad == (0, 16), (tensor.shape, scale, pad)
+        assert np.isclose(tensor[0, 0, 0], 114 / 255) and tensor[0, 32, 32] == 0
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'fake.onnx')
+            build_model(path)
+            detector = CardDetector(path)
+            assert detector.backend == 'onnx' and detector.model is not None
+
+            detections = sorted(detector.detect(frame), key=lambda d: d['label'])
+            print(f"Detections: {detections}")
+            assert [d['label'] for d in detections] == ['As', 'Th']
+            assert detections[0]['bbox'] == (30, 12, 50, 52), detections[0]['bbox']
+            assert detections[1]['bbox'] == (70, 12, 90, 52), detections[1]['bbox']
+            assert abs(detections[0]['conf'] - 0.9) < 1e-6
+
+            # The model has a fixed batch of 1: batches run frame by frame
+            batch = detector.detect_batch([frame, frame])
+            assert len(batch) == 2 and all(len(dets) == 2 for dets in batch)
+
+            # Lazy detectors find nothing until loaded (and warmed up)
+            lazy = CardDetector(path, lazy=True)
+            assert lazy.status == 'unloaded' and lazy.detect(frame) == []
+            lazy.load_async().join()
+            assert lazy.ready and len(lazy.detect(frame)) == 2, lazy.status
+
+        scores = card_scores([{'As', 'Th'}, {'Kd'}], [{'As', 'Th'}, {'Kd', 'Qc'}])
+        assert scores['precision'] == 1.0 and scores['recall'] == 0.75 and scores['frame_accuracy'] == 0.5
+
+        print("SUCCESS: Exported models keep the detect() output contract.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_detector_backends()
@@ -0,0 +1,75 @@
+from treys import Card
+
+from cards import str_to_index
+from equity_cache import EquityCache, canonicalize
+from poker import PokerEngine
+
+
+def indices(labels):
+    return [str_to_index(label) for label in labels.split()]
+
+
+def verify_equity_cache():
+    print("Testing canonical spot keys and the LRU equity cache...")
+    try:
+        # Suit-isomorphic spots and reordered cards share a key
+        key = canonicalize(indices('Ah Kh'), indices('Qh 7h 2c'), 2)
+        assert canonicalize(indices('As Ks'), indices('Qs 7s 2d'), 2) == key
+        assert canonicalize(indices('Kd Ad'), indices('2h 7d Qd'), 2) == key
+        # Different suit structure, cards or player count do not
+        assert canonicalize(indices('Ah Kh'), indices('Qs 7s 2c'), 2) != key
+        assert canonicalize(indices('Ah Ks'), indices('Qh 7h 2c'), 2) != key
+        assert canonicalize(indices('Ah Kh'), indices('Qh 7h 3c'), 2) != key
+        assert canonicalize(indices('Ah Kh'), indices('Qh 7h 2c'), 3) != key
+        # Board cards are not hero cards
+        assert canonicalize(indices('Ah Qh'), indices('Kh 7h 2c'), 2) != key
+
+        # LRU: reading an entry protects it from eviction
+        cache = EquityCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3)
+        assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+        stats = cache.stats()
+        print(f"Cache stats: {stats}")
+        assert len(cache) == 2 and stats['hits'] == 3 and stats['misses'] == 1 and stats['hit_rate'] == 0.75
+
+        # Through the engine: an isomorphic spot is served from the cache...
+        shared = EquityCache()
+        poker = PokerEngine(seed=1, cache=shared, exact_limit=0)
+        poker.hero_hand = [Card.new(c) for c in ('Ah', 'Kh')]
+        poker.community_cards = [Card.new(c) for c in ('Qh', '7h', '2c')]
+        first = poker.calculate_odds()
+        poker.hero_hand = [Card.new(c) for c in ('As', 'Ks')]
+        poker.community_cards = [Card.new(c) for c in ('Qs', '7s', '2d')]
+        assert poker.calculate_odds() == first and shared.hits == 1
+
+        # ...but not to an engine with other solver settings
+        python_engine = PokerEngine(backend='python', seed=1, cache=shared, exact_limit=0)
+        python_engine.hero_hand = poker.hero_hand
+        python_engine.community_cards = poker.community_cards
+        result = python_engine.calculate_odds()
+        assert shared.hits == 1 and result['iterations'] != first['iterations'], result
+        assert len(shared) == 2
+
+        # Nor to another sampler: a miss, not a hit thrown away, and both entries stay
+        qmc_engine = PokerEngine(seed=1, cache=shared, exact_limit=0, sampler='qmc')
+        qmc_engine.hero_hand = poker.hero_hand
+        qmc_engine.community_cards = poker.community_cards
+        result = qmc_engine.calculate_odds()
+        assert shared.hits == 1 and result['sampler'] == 'qmc' and len(shared) == 3
+        random_engine = PokerEngine(seed=2, cache=shared, exact_limit=0)
+        random_engine.hero_hand = poker.hero_hand
+        random_engine.community_cards = poker.community_cards
+        assert random_engine.calculate_odds() == first and shared.hits == 2
+
+        print("SUCCESS: Isomorphic spots share entries, other spots and settings do not.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_equity_cache()
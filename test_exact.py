@@ -0,0 +1,39 @@
+from treys import Card
+from poker import PokerEngine
+
+def verify_exact():
+    try:
+        poker = PokerEngine(cache_size=0)
+        poker.hero_hand = [Card.new('Ah'), Card.new('Kh')]
+        poker.community_cards = [Card.new('Qh'), Card.new('7h'), Card.new('2c'), Card.new('3d')]
+        poker.set_num_players(2)
+
+        # Heads-up turn is small enough to be enumerated
+        exact_odds = poker.calculate_odds()
+        print(f"Exact Turn Win%: {exact_odds['win_rate']:.3f}% (exact={exact_odds.get('exact', False)})")
+
+        # Same spot, forced through Monte Carlo
+        poker.exact_limit = 0
+        mc_odds = poker.calculate_odds()
+        print(f"Monte Carlo Turn Win%: {mc_odds['win_rate']:.3f}%")
+
+        # Repeated exact calls must not jitter
+        poker.exact_limit = 100000
+        repeat_odds = poker.calculate_odds()
+
+        if not exact_odds.get('exact') or mc_odds.get('exact'):
+            print("FAILURE: Exact mode was not selected correctly.")
+        elif repeat_odds['win_rate'] != exact_odds['win_rate']:
+            print("FAILURE: Exact results changed between calls.")
+        elif abs(exact_odds['win_rate'] - mc_odds['win_rate']) > 1.5:
+            print("FAILURE: Exact and Monte Carlo results disagree.")
+        else:
+            print("SUCCESS: Exact enumeration matches Monte Carlo.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    verify_exact()
@@ -0,0 +1,99 @@
+import numpy as np
+
+from cards import str_to_index
+from game_state import HandState, cards_to_mask, mask_to_indices
+from poker import PokerEngine
+
+
+def indices(labels):
+    return [str_to_index(label) for label in labels.split()]
+
+
+def remaining(state):
+    dead = set(state.hero + state.board)
+    return [i for i in range(52) if i not in dead]
+
+
+def detection(label, x, y):
+    return {'label': label, 'conf': 0.9, 'bbox': (x, y, x + 50, y + 70)}
+
+
+def verify_game_state():
+    print("Testing HandState transitions, masks and decks...")
+    try:
+        empty = HandState()
+        assert empty.key == (0, 0) and len(empty.deck()) == 52
+        assert cards_to_mask([0, 5, 51]) == 1 | 1 << 5 | 1 << 51 and mask_to_indices(1 | 1 << 5 | 1 << 51) == [0, 5, 51]
+
+        # Hero: setting the same cards keeps the state, new cards build a new one
+        hero = empty.with_hero(indices('Ah Kh'))
+        assert hero is not empty and empty.hero == () and hero.hero == tuple(indices('Ah Kh'))
+        assert hero.with_hero(indices('Ah Kh')) is hero
+        assert hero.contains(str_to_index('Kh')) and not hero.contains(str_to_index('Ks'))
+        assert list(hero.deck()) == remaining(hero)
+
+        # Board progression: each street removes only the new cards from the previous deck
+        flop = hero.with_board(indices('Qh 7h 2c'))
+        turn = flop.with_board(indices('Qh 7h 2c 3d'))
+        river = turn.with_board(indices('Qh 7h 2c 3d 9s'))
+        for state in (flop, turn, river):
+            deck = state.deck()
+            assert list(deck) == remaining(state) and deck.dtype == np.int64 and not deck.flags.writeable
+            assert state.hero == hero.hero and state.hero_mask == hero.hero_mask
+            assert state.dead_mask == state.hero_mask | state.board_mask
+        assert len(river.deck()) == 45 and flop.board == tuple(indices('Qh 7h 2c'))
+        assert flop.with_board(indices('2c Qh 7h')).key == flop.key
+        # The previous state is only needed until the deck is built
+        assert river._parent is None
+
+        # Cards taken away (a misread corrected): the deck is rebuilt, not derived
+        corrected = turn.with_board(indices('Qh 7h 2d 3d'))
+        assert list(corrected.deck()) == remaining(corrected)
+
+        # Reset: an empty hand again
+        reset = river.with_hero(()).with_board(())
+        assert reset.key == empty.key and list(reset.deck()) == list(range(52))
+
+        try:
+            river.extra = 1
+            raise AssertionError("HandState should have no __dict__")
+        except AttributeError:
+            pass
+
+        # Engine transitions: hero lock, board streets, reset
+        poker = PokerEngine(cache_size=0)
+        hero_cards = [detection('Ah', 400, 600), detection('Kh', 460, 600)]
+        poker.update_state(hero_cards)
+        assert poker.state.hero == tuple(indices('Ah Kh'))
+        assert poker.lock_hero_hand()
+        locked = poker.state
+        # A locked hero hand ignores later misreads
+        poker.update_state([detection('As', 400, 600), detection('Kh', 460, 600)])
+        assert poker.state.hero == locked.hero
+
+        board = [detection(label, 200 + 60 * i, 200) for i, label in enumerate(('Qh', '7h', '2c', '3d', '9s'))]
+        poker.update_state(hero_cards + board[:3])
+        assert poker.state.board == tuple(indices('Qh 7h 2c')) and poker.lock_community()
+        flop_state = poker.state
+        poker.update_state(hero_cards + board[:4])
+        assert poker.state.board == tuple(indices('Qh 7h 2c 3d')) and poker.lock_community()
+        poker.update_state(hero_cards + board)
+        assert poker.state.board == tuple(indices('Qh 7h 2c 3d 9s'))
+        # Snapshots taken earlier are untouched
+        assert flop_state.board == tuple(indices('Qh 7h 2c'))
+        # Every simulation path reuses the current state's cached deck
+        assert poker._deck(list(poker.state.hero), list(poker.state.board)) is poker.state.deck()
+        assert list(poker._deck(list(flop_state.hero), list(flop_state.board))) == remaining(flop_state)
+
+        poker.reset_hand()
+        assert poker.state.key == (0, 0) and not poker.hero_hand_locked and poker.community_locked_count == 0
+
+        print("SUCCESS: HandState tracks hero, board and deck through a hand.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_game_state()
@@ -0,0 +1,36 @@
+import sys
+import numpy as np
+from treys import Evaluator
+from cards import index_to_card
+from hand_evaluator import get_evaluator
+
+def verify_hand_evaluator(num_hands=200000):
+    try:
+        evaluator = get_evaluator()
+        treys_evaluator = Evaluator()
+
+        # Random 7-card hands as card indices
+        rng = np.random.default_rng(7)
+        hands = np.argsort(rng.random((num_hands, 52)), axis=1)[:, :7]
+
+        batch_ranks = evaluator.evaluate_batch(hands)
+        mismatches = 0
+        for hand, rank in zip(hands, batch_ranks):
+            cards = [index_to_card(c) for c in hand]
+            expected = treys_evaluator.evaluate(cards[:5], cards[5:])
+            if rank != expected or evaluator.evaluate(hand.tolist()) != expected:
+                mismatches += 1
+
+        print(f"Checked {num_hands} hands, {mismatches} mismatches")
+        if mismatches == 0:
+            print("SUCCESS: Lookup evaluator matches treys.")
+        else:
+            print("FAILURE: Lookup evaluator disagrees with treys.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    verify_hand_evaluator(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,59 @@
+import threading
+
+from treys import Card
+from poker import PokerEngine
+
+def verify_incremental():
+    try:
+        poker = PokerEngine(cache_size=0)
+        poker.hero_hand = [Card.new('Ah'), Card.new('Kh')]
+        poker.community_cards = [Card.new('Qh'), Card.new('7h'), Card.new('2c')]
+        poker.set_num_players(3)
+        version = poker.state_version
+
+        # Unchanged state: each call should add to the previous estimate
+        first = poker.calculate_odds()
+        second = poker.calculate_odds()
+        print(f"Iterations: {first['iterations']} -> {second['iterations']}")
+
+        # Any change in the spot starts a fresh estimate
+        poker.set_num_players(4)
+        fresh = poker.calculate_odds()
+        print(f"After change: {fresh['iterations']} iterations (version {version} -> {poker.state_version})")
+
+        # Concurrent calls (a cancelled refinement still on its thread and a
+        # new frame) take turns, so neither loses the other's iterations
+        before = fresh['iterations']
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(poker.calculate_odds()['iterations']))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        concurrent = sorted(results)
+        print(f"Concurrent: {concurrent}")
+
+        # Refinement stops at the cap
+        poker.max_iterations = concurrent[-1] + before
+        capped = [poker.calculate_odds()['iterations'] for _ in range(3)]
+        print(f"Capped: {capped}")
+
+        if second['iterations'] <= first['iterations']:
+            print("FAILURE: Estimate was not refined.")
+        elif fresh['iterations'] != first['iterations'] or poker.state_version == version:
+            print("FAILURE: State change was not detected.")
+        elif concurrent != [before * k for k in range(2, 6)]:
+            print("FAILURE: Concurrent calls lost iterations.")
+        elif capped != [poker.max_iterations] * 3:
+            print("FAILURE: Refinement did not stop at max_iterations.")
+        else:
+            print("SUCCESS: Odds are refined incrementally.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    verify_incremental()
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+from ingest import FrameQueue, LatestFrameSlot
+
+
+def in_thread(fn):
+    """Starts fn on a thread; returns the thread and a list that receives its result"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()), daemon=True)
+    thread.start()
+    return thread, result
+
+
+async def check_slot():
+    slot = LatestFrameSlot()
+    # Frames nobody picked up are replaced by the newest one
+    assert slot.put(1) is False and slot.put(2) is True and slot.put(3) is True
+    assert await slot.get() == 3 and slot.received == 3 and slot.dropped == 2
+
+    # A worker waiting on an empty slot wakes up when a frame arrives
+    waiter = asyncio.create_task(slot.get())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    assert slot.put(4) is False
+    assert await asyncio.wait_for(waiter, 1.0) == 4
+
+
+def verify_ingest():
+    print("Testing the latest-frame slot and the pipeline queue...")
+    try:
+        asyncio.run(check_slot())
+
+        # Live mode: a full queue drops its oldest frame
+        queue = FrameQueue(maxsize=2)
+        for frame in range(5):
+            assert queue.put(frame)
+        assert queue.dropped == 3 and queue.get() == 3 and queue.get() == 4
+
+        # A waiting consumer wakes on put...
+        thread, result = in_thread(queue.get)
+        time.sleep(0.05)
+        assert thread.is_alive()
+        queue.put('frame')
+        thread.join(1.0)
+        assert result == ['frame']
+
+        # ...and on close, after the remaining frames are drained
+        thread, result = in_thread(queue.get)
+        time.sleep(0.05)
+        queue.close()
+        thread.join(1.0)
+        assert not thread.is_alive() and result == [None]
+        assert queue.put('late') is False
+
+        # Replay mode: a full queue blocks the producer until there is room, or until closed
+        replay = FrameQueue(maxsize=1, drop_oldest=False)
+        replay.put(1)
+        thread, result = in_thread(lambda: replay.put(2))
+        time.sleep(0.05)
+        assert thread.is_alive()
+        assert replay.get() == 1
+        thread.join(1.0)
+        assert result == [True] and replay.dropped == 0
+
+        thread, result = in_thread(lambda: replay.put(3))
+        time.sleep(0.05)
+        replay.close()
+        thread.join(1.0)
+        assert result == [False] and replay.get() == 2 and replay.get() is None
+
+        print("SUCCESS: Stale frames are dropped and waiting stages wake on put and close.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_ingest()
@@ -0,0 +1,55 @@
+from metrics import REGISTRY, Registry
+
+
+def samples(text, name):
+    """(labels part, value) of every sample line of one metric family"""
+    result = []
+    for line in text.splitlines():
+        if line.startswith(name) and not line.startswith('#'):
+            series, value = line.rsplit(' ', 1)
+            result.append((series, float(value)))
+    return result
+
+
+def verify_metrics():
+    print("Testing the Prometheus text rendering...")
+    try:
+        registry = Registry()
+        latency = registry.histogram('test_seconds', 'Latency', ('stage',), buckets=(0.1, 0.5, 1.0))
+        for value in (0.05, 0.1, 0.3, 0.7, 2.0, 0.3):
+            latency.observe(value, 'detect')
+        requests = registry.counter('test_requests_total', 'Requests by "path"\nsecond line', ('path',))
+        requests.inc(2, 'a"b\\c\nd')
+        registry.callback('test_sessions', 'Live sessions', lambda: 3)
+        text = registry.render()
+        print(text)
+
+        # Buckets are cumulative, end at +Inf and agree with _count; bounds are inclusive
+        buckets = samples(text, 'test_seconds_bucket')
+        assert [series for series, _ in buckets] == [
+            'test_seconds_bucket{stage="detect",le="0.1"}', 'test_seconds_bucket{stage="detect",le="0.5"}',
+            'test_seconds_bucket{stage="detect",le="1.0"}', 'test_seconds_bucket{stage="detect",le="+Inf"}']
+        assert [value for _, value in buckets] == [2, 4, 5, 6]
+        assert samples(text, 'test_seconds_count') == [('test_seconds_count{stage="detect"}', 6)]
+        (series, total), = samples(text, 'test_seconds_sum')
+        assert series == 'test_seconds_sum{stage="detect"}' and abs(total - 3.45) < 1e-9
+        assert '# TYPE test_seconds histogram' in text
+
+        # Label values escape backslash, quote and newline; so does HELP text (except quotes)
+        assert 'test_requests_total{path="a\\"b\\\\c\\nd"} 2' in text.splitlines()
+        assert '# HELP test_requests_total Requests by "path"\\nsecond line' in text.splitlines()
+        assert 'test_sessions 3' in text.splitlines() and '# TYPE test_sessions gauge' in text
+
+        # The server's registry renders too (its /metrics output)
+        shared = REGISTRY.render()
+        assert '# TYPE poker_stage_seconds histogram' in shared and shared.endswith('\n')
+
+        print("SUCCESS: Metrics render as valid Prometheus text.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_metrics()
@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+
+import preflop
+import vector_sim
+from cards import str_to_index
+
+ITERATIONS = 100000
+
+
+def indices(labels):
+    return [str_to_index(label) for label in labels.split()]
+
+
+def verify_preflop():
+    print("Testing canonical preflop hands and the equity table...")
+    try:
+        # Suited, offsuit and pairs: suits and card order don't matter, suitedness does
+        suited = preflop.hand_index(*indices('Ah Kh'))
+        assert preflop.hand_index(*indices('Ks As')) == suited and preflop.hand_name(suited) == 'AKs'
+        offsuit = preflop.hand_index(*indices('Ah Ks'))
+        assert preflop.hand_index(*indices('Kd Ac')) == offsuit and preflop.hand_name(offsuit) == 'AKo'
+        pair = preflop.hand_index(*indices('7h 7c'))
+        assert preflop.hand_index(*indices('7s 7d')) == pair and preflop.hand_name(pair) == '77'
+        assert len({suited, offsuit, pair}) == 3
+        assert preflop.hand_name(preflop.hand_index(*indices('9c Th'))) == 'T9o'
+        assert preflop.hand_name(preflop.hand_index(*indices('2d 2h'))) == '22'
+
+        # Every canonical hand has a representative that maps back to it
+        names = set()
+        for index in range(preflop.NUM_HANDS):
+            hero = preflop.representative_hand(index)
+            assert hero[0] != hero[1] and preflop.hand_index(*hero) == index, (index, hero)
+            names.add(preflop.hand_name(index))
+        assert len(names) == preflop.NUM_HANDS
+
+        table = preflop.load_table()
+        if table is None:
+            print("SKIPPED: no preflop table built (python preflop.py)")
+            return
+
+        # One table entry against a fresh simulation, any suits: AKs vs 2 opponents
+        hero = indices('Ad Kd')
+        win_rate, tie_rate = preflop.lookup(table, hero, 3)
+        wins, ties = vector_sim.simulate(hero, [], 2, ITERATIONS, np.random.default_rng(7))
+        simulated = wins / ITERATIONS * 100
+        p = win_rate / 100
+        se = math.sqrt(p * (1 - p) / ITERATIONS + p * (1 - p) / preflop.TABLE_ITERATIONS) * 100
+        print(f"AKs 3-way: table {win_rate:.2f}% (tie {tie_rate:.2f}%), simulated {simulated:.2f}% (SE {se:.2f})")
+        assert abs(simulated - win_rate) < 4 * se
+        assert abs(ties / ITERATIONS * 100 - tie_rate) < 0.5
+
+        # Aces are a big favourite heads-up and lose equity with every player added
+        assert preflop.lookup(table, indices('Ah As'), 2)[0] > 80
+        assert preflop.lookup(table, indices('Ah As'), 9)[0] < preflop.lookup(table, indices('Ah As'), 2)[0]
+
+        print("SUCCESS: Canonical hands map correctly and the table matches simulation.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_preflop()
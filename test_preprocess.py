@@ -0,0 +1,108 @@
+import numpy as np
+
+from preprocess import FramePreprocessor
+from tracker import CardTracker
+
+# Cards in a 1080p frame: hero row at the bottom, board row above it
+CARDS = {
+    'Ah': (800, 850, 900, 1000), 'Kh': (920, 850, 1020, 1000),
+    'Qh': (600, 300, 700, 450), '7h': (720, 300, 820, 450), '2c': (840, 300, 940, 450),
+}
+
+def fake_detect_batch(prepared, cards):
+    """Reports every card fully inside each prepared region, in that region's coordinates"""
+    results = []
+    for image, (x0, y0, scale) in prepared:
+        h, w = image.shape[:2]
+        detections = []
+        for label, (x1, y1, x2, y2) in cards.items():
+            if x1 >= x0 and y1 >= y0 and x2 <= x0 + w / scale and y2 <= y0 + h / scale:
+                bbox = ((x1 - x0) * scale, (y1 - y0) * scale, (x2 - x0) * scale, (y2 - y0) * scale)
+                detections.append({'label': label, 'conf': 0.9, 'bbox': bbox})
+        results.append(detections)
+    return results
+
+def verify_preprocess():
+    try:
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        preprocessor = FramePreprocessor(input_size=640, full_frame_interval=10)
+        pixels = []
+        found = []
+        max_error = 0
+        cards = dict(CARDS)
+        for keyframe in range(12):
+            if keyframe == 5:
+                # Camera shifted: a card leaves the learned regions
+                cards['2c'] = (1500, 300, 1600, 450)
+            prepared = preprocessor.prepare(frame)
+            detections = preprocessor.merge(prepared, fake_detect_batch(prepared, cards))
+            pixels.append(sum(image.shape[0] * image.shape[1] for image, _ in prepared))
+            found.append(len(detections))
+            for det in detections:
+                max_error = max(max_error, max(abs(a - b) for a, b in zip(det['bbox'], cards[det['label']])))
+
+        print(f"Pixels per keyframe: {pixels}")
+        print(f"Cards found: {found}")
+        print(f"Passes: {preprocessor.stats()}, max box error: {max_error}px")
+
+        if pixels[0] != 640 * 360:
+            print("FAILURE: Full frame was not downscaled to the model input size.")
+        elif max(pixels[1:5]) > pixels[0] / 4:
+            print("FAILURE: Cropped passes did not cut the pixels processed.")
+        elif found[:5] != [5] * 5 or max_error > 4:
+            print("FAILURE: Cards were lost or misplaced by cropping.")
+        elif found[6] != 5:
+            print("FAILURE: Did not recover with a full-frame pass after losing a card.")
+        else:
+            print("SUCCESS: Preprocessing crops to card regions and recovers.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+def draw(cards):
+    """A dark table with the cards as white rectangles"""
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    for x1, y1, x2, y2 in cards.values():
+        frame[y1:y2, x1:x2] = 255
+    return frame
+
+def verify_scene_change():
+    try:
+        # Hero cards first, the flop is dealt outside the learned regions at frame 8
+        tracker = CardTracker(keyframe_interval=30, diff_threshold=4.0)
+        preprocessor = FramePreprocessor(input_size=640, full_frame_interval=10)
+        hero = {label: CARDS[label] for label in ('Ah', 'Kh')}
+        found = []
+        full = []
+        for index in range(12):
+            cards = hero if index < 8 else CARDS
+            frame = draw(cards)
+            if tracker.needs_detection(frame):
+                prepared = preprocessor.prepare(frame, tracker.scene_change)
+                detections = preprocessor.merge(prepared, fake_detect_batch(prepared, cards))
+                tracker.update(frame, detections)
+                full.append(preprocessor._full)
+            else:
+                tracker.propagate(frame)
+            found.append(len(tracker.cards()))
+
+        print(f"Cards tracked: {found}")
+        print(f"Keyframes: {tracker.keyframes}, full passes: {full}")
+
+        if found[:8] != [2] * 8 or found[8:] != [5] * 4:
+            print("FAILURE: Newly dealt cards were not picked up on the scene-change keyframe.")
+        elif full != [True, True]:
+            print("FAILURE: Expected a full pass on the first frame and on the deal only.")
+        else:
+            print("SUCCESS: A scene change forces a full-frame pass.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    verify_preprocess()
+    verify_scene_change()
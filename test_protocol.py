@@ -0,0 +1,59 @@
+import struct
+
+import cv2
+import numpy as np
+
+from protocol import FRAME_HEADER, ProtocolError, pack_frame, unpack_frame
+
+
+def rejects(buffer):
+    try:
+        unpack_frame(buffer)
+    except ProtocolError as e:
+        return str(e)
+    return None
+
+
+def verify_protocol():
+    print("Testing the binary frame protocol...")
+    try:
+        jpeg = cv2.imencode('.jpg', np.zeros((8, 8, 3), dtype=np.uint8))[1].tobytes()
+
+        # Round trip, with the largest header values
+        message = pack_frame(2 ** 32 - 1, 12345, 9, jpeg)
+        assert len(message) == FRAME_HEADER.size + len(jpeg) == 9 + len(jpeg)
+        frame = unpack_frame(message)
+        assert (frame['session'], frame['seq'], frame['num_players']) == (2 ** 32 - 1, 12345, 9)
+        assert bytes(frame['jpeg']) == jpeg and isinstance(frame['jpeg'], memoryview)
+        # Big-endian on the wire, like the browser's DataView
+        assert message[:9] == bytes([255, 255, 255, 255, 0, 0, 0x30, 0x39, 9])
+        assert cv2.imdecode(np.frombuffer(frame['jpeg'], np.uint8), cv2.IMREAD_COLOR).shape == (8, 8, 3)
+
+        errors = {
+            'truncated header': rejects(message[:5]),
+            'header only': rejects(message[:FRAME_HEADER.size]),
+            'short payload': rejects(message[:FRAME_HEADER.size + 2]),
+            'not a JPEG': rejects(pack_frame(1, 1, 2, b'\x89PNG\r\n\x1a\n')),
+        }
+        print(f"Errors: {errors}")
+        assert errors['truncated header'].startswith("Truncated frame header")
+        assert all(error is not None for error in errors.values())
+        assert errors['not a JPEG'].startswith("Unknown frame payload type")
+
+        # Out-of-range header fields can't be packed
+        try:
+            pack_frame(1, 1, 256, jpeg)
+            packed = True
+        except struct.error:
+            packed = False
+        assert not packed, "num_players above 255 was packed"
+
+        print("SUCCESS: Frame messages round-trip and malformed ones are rejected.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_protocol()
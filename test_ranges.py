@@ -0,0 +1,72 @@
+import time
+
+from treys import Card
+from poker import PokerEngine, sampling_error
+from ranges import parse_range
+
+def verify_ranges():
+    try:
+        # Notation expands to the right number of combos
+        sizes = {text: len(parse_range(text)) for text in ["QQ+, AKs, 76s", "AK", "A2s+", "22-55", "AhKh, AKo:0.5"]}
+        print(f"Combos: {sizes}")
+
+        # Weights must be finite and non-negative
+        rejected = []
+        for text in ["AK:-1", "AK:nan", "AK:inf", "AK:x"]:
+            try:
+                parse_range(text)
+            except ValueError:
+                rejected.append(text)
+
+        poker = PokerEngine(cache_size=0)
+        poker.hero_hand = [Card.new('Kh'), Card.new('Kd')]
+        poker.set_num_players(2)
+
+        # KK vs AA is about 18% preflop
+        poker.set_opponent_range(0, "AA")
+        vs_aces = poker.calculate_odds(target_se=0.3)
+        print(f"KK vs AA: {vs_aces['win_rate']:.2f}%")
+
+        # A random range must agree with the uniform simulation
+        poker.set_opponent_range(0, "random")
+        vs_random = poker.calculate_odds(target_se=0.3)
+        poker.set_opponent_range(0, None)
+        uniform = poker.calculate_odds()
+        print(f"KK vs random: {vs_random['win_rate']:.2f}% (uniform table: {uniform['win_rate']:.2f}%)")
+
+        # 9-handed flop with every seat on a range stays interactive
+        poker.community_cards = [Card.new('2c'), Card.new('7d'), Card.new('9s')]
+        poker.set_num_players(9)
+        for seat in range(8):
+            poker.set_opponent_range(seat, "22+, A2s+, KTs+, ATo+")
+        start = time.perf_counter()
+        nine = poker.calculate_odds(time_budget=0.2)
+        elapsed = time.perf_counter() - start
+        print(f"9-handed vs ranges: {nine['win_rate']:.2f}% from {nine['iterations']} iterations in {elapsed:.3f}s")
+        # Seats colliding on cards make the iterations unequally weighted: fewer effective samples
+        binomial = sampling_error(nine['win_rate'] / 100 * nine['iterations'], nine['iterations'])
+        print(f"Effective iterations: {nine.get('effective_iterations', 0):.0f}, "
+              f"SE {nine['std_error']:.3f} (binomial {binomial:.3f})")
+
+        if sizes != {"QQ+, AKs, 76s": 26, "AK": 16, "A2s+": 48, "22-55": 24, "AhKh, AKo:0.5": 13}:
+            print("FAILURE: Range notation expanded incorrectly.")
+        elif len(rejected) != 4:
+            print("FAILURE: Invalid range weights were accepted.")
+        elif not nine.get('effective_iterations', nine['iterations']) < nine['iterations'] or nine['std_error'] <= binomial:
+            print("FAILURE: Weighted estimates report the binomial standard error.")
+        elif abs(vs_aces['win_rate'] - 18.0) > 1.5:
+            print("FAILURE: KK vs AA equity is off.")
+        elif abs(vs_random['win_rate'] - uniform['win_rate']) > 1.5:
+            print("FAILURE: Random range disagrees with the uniform simulation.")
+        elif elapsed > 1.0:
+            print("FAILURE: Range simulation is too slow.")
+        else:
+            print("SUCCESS: Range equity matches known values.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    verify_ranges()
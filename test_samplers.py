@@ -0,0 +1,78 @@
+import numpy as np
+from treys import Card
+
+import exact
+import samplers
+from cards import str_to_index
+from poker import PokerEngine
+
+HERO = ['Ah', 'Kh']
+BOARD = ['Qh', '7h', '2c']
+# Heads-up on the flop and three-way on the turn (multiway flops are slow to enumerate)
+SPOTS = [(BOARD, 1), (BOARD + ['3d'], 2)]
+RUNS = 20
+DEALS_PER_RUN = 20000
+
+
+def verify_samplers():
+    print("Testing variance-reduced samplers against exact enumeration...")
+    try:
+        hero = [str_to_index(c) for c in HERO]
+
+        for labels, num_opponents in SPOTS:
+            board = [str_to_index(c) for c in labels]
+            wins, _, total = exact.enumerate_equity(hero, board, num_opponents)
+            truth = wins / total
+            print(f"{' '.join(labels)} vs {num_opponents} opponent(s), exact {truth * 100:.3f}%")
+
+            variances = {}
+            for name in samplers.SAMPLERS:
+                size = samplers.replicate_size(name, hero, board, num_opponents)
+                replicates = max(2, DEALS_PER_RUN // size)
+                estimates, errors, spread = [], [], []
+                for seed in range(RUNS):
+                    win, _ = samplers.sample(name, hero, board, num_opponents, replicates, np.random.default_rng(seed))
+                    estimates.append(win.mean())
+                    errors.append(win.std(ddof=1) / np.sqrt(len(win)))
+                    spread.append(win.var(ddof=1))
+
+                # Unbiased: the pooled estimate sits within 4 standard errors of the truth
+                pooled_se = np.sqrt(np.mean(errors) ** 2 / RUNS)
+                z = (np.mean(estimates) - truth) / pooled_se
+                # Honest error: reported SEs match the spread of independent runs
+                calibration = np.std(estimates, ddof=1) / np.mean(errors)
+                # Variance per evaluated deal, relative to plain sampling below
+                variances[name] = np.mean(spread) * size
+                print(f"  {name:10s} {np.mean(estimates) * 100:.3f}% z={z:+.2f} "
+                      f"SE {np.mean(errors) * 100:.3f} (runs spread {np.std(estimates, ddof=1) * 100:.3f})")
+                assert abs(z) < 4, f"{name} looks biased (z={z:.2f})"
+                assert 0.5 < calibration < 1.8, f"{name} misreports its error ({calibration:.2f})"
+
+            for name in samplers.SAMPLERS[1:]:
+                gain = variances['random'] / variances[name]
+                print(f"  {name} needs {1 / gain:.2f}x the evaluations of random sampling")
+                assert gain > 1.3, f"{name} does not reduce variance ({gain:.2f})"
+
+        # Through the engine: same target, fewer evaluations, refinement keeps the tally
+        iterations = {}
+        for name in ('random', 'qmc'):
+            poker = PokerEngine(seed=1, exact_limit=0, sampler=name)
+            poker.hero_hand = [Card.new(c) for c in HERO]
+            poker.community_cards = [Card.new(c) for c in BOARD]
+            result = poker.calculate_odds(target_se=0.3)
+            refined = poker.calculate_odds(target_se=0.2)
+            assert refined['iterations'] > result['iterations'] and refined['std_error'] <= 0.2
+            iterations[name] = refined['iterations']
+        print(f"Iterations to SE 0.2: {iterations}")
+        assert refined['sampler'] == 'qmc' and refined['replicates'] >= 10
+        assert iterations['qmc'] < iterations['random']
+
+        print("SUCCESS: Samplers are unbiased, report honest errors and need fewer evaluations.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_samplers()
@@ -0,0 +1,63 @@
+from sessions import SessionLimitError, SessionManager
+
+
+def verify_sessions():
+    print("Testing session creation, reuse and idle eviction...")
+    try:
+        engines = []
+        def factory():
+            engines.append(object())
+            return engines[-1]
+        manager = SessionManager(factory, max_sessions=2, idle_timeout=60)
+
+        # A table ID gets one session (and one engine) however many connections share it
+        table = manager.acquire('table-1')
+        again = manager.acquire('table-1')
+        assert again is table and table.named and table.connections == 2 and len(engines) == 1
+        assert table.engine is engines[0] and table.number == 1
+
+        # Anonymous connections get their own session, dropped when they close
+        anonymous = manager.acquire()
+        assert not anonymous.named and anonymous.id != table.id and anonymous.number == 2
+        manager.release(anonymous)
+        assert anonymous.id not in manager.sessions
+
+        # Named sessions outlive their connections, until idle past the timeout
+        manager.release(table)
+        manager.release(table)
+        assert table.id in manager.sessions and table.connections == 0
+        assert manager.evict_idle() == []
+        table.last_seen -= 61
+        assert manager.evict_idle() == [table.id] and not manager.sessions
+
+        # Sessions with a live connection are never evicted
+        busy = manager.acquire('busy')
+        busy.last_seen -= 3600
+        assert manager.evict_idle() == []
+
+        # At the limit, idle sessions make room; otherwise the connection is rejected
+        idle = manager.acquire('idle')
+        manager.release(idle)
+        try:
+            manager.acquire('full')
+            raise AssertionError("Session limit not enforced")
+        except SessionLimitError:
+            pass
+        idle.last_seen -= 61
+        full = manager.acquire('full')
+        assert set(manager.sessions) == {'busy', 'full'} and full.connections == 1
+
+        metrics = manager.metrics()
+        print(f"Metrics: {metrics}")
+        assert metrics['created_total'] == 5 and metrics['evicted_total'] == 2 and metrics['rejected_total'] == 1
+        assert metrics['sessions'] == 2 and metrics['connections'] == 2
+
+        print("SUCCESS: Sessions are shared per table and evicted when idle.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_sessions()
@@ -0,0 +1,40 @@
+from treys import Card
+from poker import PokerEngine
+from sim_pool import SimulationPool
+
+def verify_sim_pool():
+    pool = SimulationPool(workers=2)
+    try:
+        pool.start()
+
+        # Scenario: AhKh on Qh 7h 2c, 4 players, cache disabled so every call simulates
+        def run(engine_pool, seed):
+            poker = PokerEngine(cache_size=0, pool=engine_pool, seed=seed)
+            poker.hero_hand = [Card.new('Ah'), Card.new('Kh')]
+            poker.community_cards = [Card.new('Qh'), Card.new('7h'), Card.new('2c')]
+            poker.set_num_players(4)
+            return poker.calculate_odds()
+
+        single = run(None, 1)
+        parallel = run(pool, 1)
+        repeat = run(pool, 1)
+        print(f"Single process Win%: {single['win_rate']:.2f}%")
+        print(f"Process pool Win%: {parallel['win_rate']:.2f}%")
+
+        # 50k iterations -> ~0.22% standard error per estimate
+        if parallel['win_rate'] != repeat['win_rate']:
+            print("FAILURE: Pool results are not reproducible for a fixed seed.")
+        elif abs(single['win_rate'] - parallel['win_rate']) > 1.5:
+            print("FAILURE: Pool and single process results disagree.")
+        else:
+            print("SUCCESS: Pool matches single process and is reproducible.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    verify_sim_pool()
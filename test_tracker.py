@@ -0,0 +1,80 @@
+import cv2
+import numpy as np
+
+from tracker import CardTracker
+
+BOX = (400, 300, 480, 420)
+
+
+def textured_frame(seed=0):
+    """A 1280x720 frame with blurred noise, so shifts are easy to measure"""
+    noise = np.random.default_rng(seed).integers(0, 256, (720, 1280), dtype=np.uint8)
+    gray = cv2.GaussianBlur(noise, (0, 0), 6)
+    gray = cv2.normalize(gray, None, 0, 255, cv2.NORM_MINMAX)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def card(label, conf=0.9, bbox=BOX):
+    return {'label': label, 'conf': conf, 'bbox': bbox}
+
+
+def verify_tracker():
+    print("Testing keyframe scheduling, box propagation and label voting...")
+    try:
+        frame = textured_frame()
+
+        # Keyframes: the first frame, then every keyframe_interval frames while the scene is still
+        tracker = CardTracker(keyframe_interval=5)
+        schedule = []
+        for _ in range(11):
+            keyframe = tracker.needs_detection(frame)
+            assert not tracker.scene_change
+            schedule.append(keyframe)
+            if keyframe:
+                tracker.update(frame, [card('Ah')])
+            else:
+                tracker.propagate(frame)
+        print(f"Keyframe schedule: {[int(k) for k in schedule]}")
+        assert schedule == [True, False, False, False, False] * 2 + [True]
+        assert tracker.keyframes == 3 and tracker.tracked_frames == 8
+
+        # Scene change: a different frame forces a keyframe right away
+        tracker.propagate(frame)
+        assert tracker.needs_detection(textured_frame(seed=1)) and tracker.scene_change
+        assert not tracker.needs_detection(frame) and not tracker.scene_change
+
+        # Propagation: boxes follow a global shift (48, 24 px = 6, 3 thumbnail px)
+        tracker = CardTracker()
+        tracker.update(frame, [card('Ah')])
+        shifted = np.roll(frame, (24, 48), axis=(0, 1))
+        moved = tracker.propagate(shifted)[0]['bbox']
+        print(f"Box after the shift: {moved}")
+        assert max(abs(a - b) for a, b in zip(moved, (448, 324, 528, 444))) <= 8, moved
+
+        # Voting: one misread doesn't flip the label, low confidence hides the card
+        tracker = CardTracker(history=5, min_conf=0.35, max_missed=2)
+        for label, conf in [('Ah', 0.9), ('Ah', 0.8), ('Ad', 0.95), ('Ah', 0.7)]:
+            cards = tracker.update(frame, [card(label, conf)])
+        assert [c['label'] for c in cards] == ['Ah'], cards
+        assert abs(cards[0]['conf'] - (0.9 + 0.8 + 0.7) / 4) < 1e-9
+
+        weak = CardTracker(min_conf=0.35)
+        assert weak.update(frame, [card('Ks', 0.3)]) == []
+
+        # Misses: the card fades out of the votes, and its track is dropped after max_missed keyframes
+        counts, tracks = [], []
+        for _ in range(3):
+            counts.append(len(tracker.update(frame, [])))
+            tracks.append(len(tracker.tracks))
+        print(f"Cards while missed: {counts}, tracks: {tracks}")
+        assert counts == [1, 0, 0] and tracks == [1, 1, 0]
+
+        print("SUCCESS: Tracker schedules keyframes, follows shifts and smooths labels.")
+    except Exception as e:
+        print(f"FAILURE: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    verify_tracker()
@@ -0,0 +1,28 @@
+from treys import Card
+from poker import PokerEngine
+
+def verify_vector_sim():
+    try:
+        # Both backends should agree on a flop spot
+        results = {}
+        for backend in ('python', 'numpy'):
+            poker = PokerEngine(backend=backend)
+            poker.hero_hand = [Card.new('Ah'), Card.new('Kh')]
+            poker.community_cards = [Card.new('Qh'), Card.new('7h'), Card.new('2c')]
+            poker.set_num_players(3)
+            results[backend] = poker.calculate_odds()
+            print(f"{backend} backend Win%: {results[backend]['win_rate']:.2f}%")
+
+        # 1000 python iterations -> ~1.5% standard error
+        if abs(results['python']['win_rate'] - results['numpy']['win_rate']) < 6:
+            print("SUCCESS: Backends agree.")
+        else:
+            print("FAILURE: Backends disagree.")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    verify_vector_sim()
@@ -0,0 +1,172 @@
+from collections import Counter, deque
+
+import cv2
+import numpy as np
+
+
+def _iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Track:
+    """One physical card: its box and a short history of (label, conf) votes"""
+
+    def __init__(self, detection, history):
+        self.bbox = detection['bbox']
+        self.votes = deque(maxlen=history)
+        self.votes.append((detection['label'], detection['conf']))
+        self.missed = 0
+
+    def observe(self, detection):
+        self.bbox = detection['bbox']
+        self.votes.append((detection['label'], detection['conf']))
+        self.missed = 0
+
+    def miss(self):
+        self.votes.append((None, 0.0))
+        self.missed += 1
+
+    def best(self):
+        """Label with the most confidence over the history, and its average confidence"""
+        totals = Counter()
+        for label, conf in self.votes:
+            if label is not None:
+                totals[label] += conf
+        if not totals:
+            return None, 0.0
+        label, total = totals.most_common(1)[0]
+        return label, total / len(self.votes)
+
+
+class CardTracker:
+    """
+    Runs full detection only on keyframes and carries card boxes forward in
+    between using a global shift estimate. A keyframe is forced every
+    `keyframe_interval` frames, or earlier when the frame differs too much
+    from the last keyframe (a card was dealt, the camera moved, ...).
+
+    Labels are smoothed over the last `history` keyframes: each card reports
+    the label with the highest summed confidence, and cards whose average
+    confidence drops below `min_conf` are hidden.
+    """
+
+    def __init__(self, keyframe_interval=10, diff_threshold=8.0, history=5, min_conf=0.35,
+                 max_missed=2, match_iou=0.3, thumb_width=160):
+        self.keyframe_interval = keyframe_interval
+        self.diff_threshold = diff_threshold
+        self.history = history
+        self.min_conf = min_conf
+        self.max_missed = max_missed
+        self.match_iou = match_iou
+        self.thumb_width = thumb_width
+
+        self.tracks = []
+        self.keyframes = 0
+        self.tracked_frames = 0
+        self._keyframe_thumb = None
+        self._last_thumb = None
+        self._since_keyframe = 0
+        # Whether the last needs_detection() call saw a scene change (not just the interval)
+        self.scene_change = False
+
+    def reset(self):
+        self.tracks = []
+        self._keyframe_thumb = None
+        self._last_thumb = None
+        self._since_keyframe = 0
+        self.scene_change = False
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        thumb_h = max(1, round(h * self.thumb_width / w))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, (self.thumb_width, thumb_h), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def needs_detection(self, frame):
+        """
+        True when this frame should get a full detection pass. Sets
+        `scene_change` when that is because the frame changed (new cards may
+        be anywhere), not because of the keyframe interval.
+        """
+        self.scene_change = False
+        if self._keyframe_thumb is None:
+            return True
+        thumb = self._thumbnail(frame)
+        # Scene change: mean absolute difference in gray levels (0..255)
+        self.scene_change = (thumb.shape != self._keyframe_thumb.shape or
+                             float(np.mean(np.abs(thumb - self._keyframe_thumb))) > self.diff_threshold)
+        return self.scene_change or self._since_keyframe + 1 >= self.keyframe_interval
+
+    def update(self, frame, detections):
+        """Feeds a keyframe's detections. Returns the smoothed cards."""
+        self.keyframes += 1
+        self._since_keyframe = 0
+        self._keyframe_thumb = self._last_thumb = self._thumbnail(frame)
+
+        # Greedy IoU matching, best overlaps first
+        pairs = sorted(
+            ((_iou(t.bbox, d['bbox']), ti, di) for ti, t in enumerate(self.tracks) for di, d in enumerate(detections)),
+            reverse=True
+        )
+        matched_tracks = set()
+        matched_detections = set()
+        for iou, ti, di in pairs:
+            if iou < self.match_iou:
+                break
+            if ti in matched_tracks or di in matched_detections:
+                continue
+            self.tracks[ti].observe(detections[di])
+            matched_tracks.add(ti)
+            matched_detections.add(di)
+
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.miss()
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+        for di, detection in enumerate(detections):
+            if di not in matched_detections:
+                self.tracks.append(Track(detection, self.history))
+
+        return self.cards()
+
+    def propagate(self, frame):
+        """Moves the tracked boxes to a non-keyframe. Returns the smoothed cards."""
+        self.tracked_frames += 1
+        self._since_keyframe += 1
+        thumb = self._thumbnail(frame)
+
+        if self._last_thumb is not None and thumb.shape == self._last_thumb.shape and self.tracks:
+            (dx, dy), _ = cv2.phaseCorrelate(self._last_thumb, thumb)
+            scale = frame.shape[1] / self.thumb_width
+            dx, dy = int(round(dx * scale)), int(round(dy * scale))
+            if dx or dy:
+                for track in self.tracks:
+                    x1, y1, x2, y2 = track.bbox
+                    track.bbox = (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+        self._last_thumb = thumb
+
+        return self.cards()
+
+    def process(self, frame, detect):
+        """
+        Convenience for synchronous loops: `detect(frame, scene_change)` is
+        called only on keyframes
+        """
+        if self.needs_detection(frame):
+            return self.update(frame, detect(frame, self.scene_change))
+        return self.propagate(frame)
+
+    def cards(self):
+        """Current cards in CardDetector.detect format, one entry per label"""
+        best = {}
+        for track in self.tracks:
+            label, conf = track.best()
+            if label is None or conf < self.min_conf:
+                continue
+            if label not in best or conf > best[label]['conf']:
+                best[label] = {'label': label, 'conf': conf, 'bbox': track.bbox}
+        return list(best.values())
@@ -0,0 +1,167 @@
+import numpy as np
+
+from cards import NUM_CARDS
+from hand_evaluator import get_evaluator
+
+def deal(rng, available, iterations, num_cards):
+    """
+    Deals `num_cards` distinct cards from `available` for every iteration at once
+    using a partial Fisher-Yates shuffle of each row.
+    Returns an array of shape (iterations, num_cards).
+    """
+    size = len(available)
+    decks = np.tile(np.asarray(available, dtype=np.int8), (iterations, 1))
+    rows = np.arange(iterations)
+    for i in range(num_cards):
+        swap = rng.integers(i, size, iterations)
+        picked = decks[rows, swap]
+        decks[rows, swap] = decks[:, i]
+        decks[:, i] = picked
+    return decks[:, :num_cards].astype(np.int64)
+
+
+def remaining_deck(hero, board):
+    """Sorted array of the card indices not in hero or board"""
+    known = np.zeros(NUM_CARDS, dtype=bool)
+    known[list(hero) + list(board)] = True
+    return np.flatnonzero(~known)
+
+
+def simulate(hero, board, num_opponents, iterations, rng=None, available=None):
+    """
+    Batched Monte Carlo equity simulation.
+    hero, board: lists of card indices (see cards.py)
+    available: the remaining deck if the caller has it (HandState.deck())
+    Returns (wins, ties) counts over `iterations` random runouts.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if available is None:
+        available = remaining_deck(hero, board)
+
+    board_needed = 5 - len(board)
+    cards_needed = num_opponents * 2 + board_needed
+    if iterations <= 0 or len(available) < cards_needed:
+        return 0, 0
+
+    dealt = deal(rng, available, iterations, cards_needed)
+
+    # Layout of each deal: [opp1, opp1, opp2, opp2, ..., board fill]
+    full_board = np.empty((iterations, 5), dtype=np.int64)
+    full_board[:, :len(board)] = board
+    full_board[:, len(board):] = dealt[:, num_opponents * 2:]
+
+    opp_holes = dealt[:, :num_opponents * 2].reshape(iterations, num_opponents, 2)
+    hero_ranks, best_opp = _showdown(hero, full_board, opp_holes)
+
+    # Lower rank is better
+    wins = int(np.count_nonzero(hero_ranks < best_opp))
+    ties = int(np.count_nonzero(hero_ranks == best_opp))
+    return wins, ties
+
+
+def _showdown(hero, full_board, opp_holes):
+    """Hero's rank and the best opponent rank for every iteration"""
+    iterations, num_opponents = opp_holes.shape[:2]
+    evaluator = get_evaluator()
+    hero_hands = np.concatenate([full_board, np.broadcast_to(hero, (iterations, 2))], axis=1)
+    hero_ranks = evaluator.evaluate_batch(hero_hands)
+
+    opp_hands = np.concatenate([np.broadcast_to(full_board[:, None, :], (iterations, num_opponents, 5)), opp_holes], axis=2)
+    best_opp = evaluator.evaluate_batch(opp_hands).min(axis=1)
+    return hero_ranks, best_opp
+
+
+# Rows sampled at once against ranges; bounds the (rows, combos) temporaries
+RANGE_BLOCK = 2048
+
+
+def simulate_ranges(hero, board, opponent_ranges, iterations, rng=None):
+    """
+    Monte Carlo equity against opponents with hand ranges.
+    opponent_ranges: one ranges.Range per opponent, None for a random hand
+
+    Each opponent with a range draws from the combos that don't collide with
+    cards already dealt in that iteration (inverse CDF over the masked
+    weights), so there are no rejection loops. Dealing seats one after
+    another skews the joint distribution towards the earlier seats; every
+    iteration is weighted by the remaining range weight at each seat, which
+    makes the weighted counts unbiased. Random opponents and the runout are
+    then dealt uniformly from what is left of the deck.
+
+    Returns weighted (wins, ties) scaled to `iterations` (floats) and the
+    effective sample size (sum w)^2 / sum w^2 of the weighted iterations,
+    which sets the standard error.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if iterations <= 0:
+        return 0.0, 0.0, 0.0
+
+    dead = list(hero) + list(board)
+    seats = []
+    for opponent_range in opponent_ranges:
+        if opponent_range is None:
+            continue
+        combos, weights = opponent_range.without(dead)
+        if len(combos) == 0:
+            return 0.0, 0.0, 0.0
+        seats.append((combos, weights, weights.sum()))
+    num_random = len(opponent_ranges) - len(seats)
+
+    wins = ties = total_weight = squared_weight = 0.0
+    for start in range(0, iterations, RANGE_BLOCK):
+        rows = min(RANGE_BLOCK, iterations - start)
+        w, t, weight, squared = _simulate_range_block(hero, board, seats, num_random, rows, rng)
+        wins += w
+        ties += t
+        total_weight += weight
+        squared_weight += squared
+
+    if total_weight == 0:
+        return 0.0, 0.0, 0.0
+    effective = total_weight * total_weight / squared_weight
+    return wins / total_weight * iterations, ties / total_weight * iterations, effective
+
+
+def _simulate_range_block(hero, board, seats, num_random, rows, rng):
+    # Card-major layout (card, row) keeps the per-combo work below contiguous
+    taken = np.zeros((NUM_CARDS, rows), dtype=bool)
+    taken[list(hero) + list(board)] = True
+    opp_holes = np.empty((rows, len(seats) + num_random, 2), dtype=np.int64)
+    weight = np.ones(rows)
+    row_index = np.arange(rows)
+
+    for seat, (combos, weights, static_total) in enumerate(seats):
+        # (combo, row) cumulative weight of the combos still free in each row
+        free = ~(taken[combos[:, 0]] | taken[combos[:, 1]])
+        cdf = np.cumsum(free * weights[:, None].astype(np.float32), axis=0, dtype=np.float32)
+        total = cdf[-1]
+
+        # Inverse CDF: first combo whose cumulative weight passes the draw
+        draws = rng.random(rows) * total
+        picked = np.minimum(np.count_nonzero(cdf <= draws, axis=0), len(combos) - 1)
+
+        holes = combos[picked]
+        opp_holes[:, seat] = holes
+        taken[holes[:, 0], row_index] = True
+        taken[holes[:, 1], row_index] = True
+        weight *= total / static_total
+
+    # Random opponents and the runout: the cards with the smallest random
+    # keys among those still in the deck
+    full_board = np.empty((rows, 5), dtype=np.int64)
+    full_board[:, :len(board)] = board
+    board_needed = 5 - len(board)
+    cards_needed = num_random * 2 + board_needed
+    if cards_needed:
+        keys = rng.random((rows, NUM_CARDS))
+        keys[taken.T] = 2.0
+        dealt = np.argpartition(keys, cards_needed, axis=1)[:, :cards_needed]
+        opp_holes[:, len(seats):] = dealt[:, :num_random * 2].reshape(rows, num_random, 2)
+        full_board[:, len(board):] = dealt[:, num_random * 2:]
+
+    hero_ranks, best_opp = _showdown(hero, full_board, opp_holes)
+    wins = float(weight[hero_ranks < best_opp].sum())
+    ties = float(weight[hero_ranks == best_opp].sum())
+    return wins, ties, float(weight.sum()), float(np.dot(weight, weight))